@@ -25,11 +25,13 @@ app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 app.conf.beat_schedule = {
     'check-signals': {
         'task': 'trading_bot.tasks.check_signals',
-        'schedule': 15.0,  # каждую минуту
+        'schedule': settings.CHECK_SIGNALS_INTERVAL,
     },
     "manage_bot": {
         'task': 'trading_bot.tasks.manage_bot',
-        'schedule': 15.0,
+        'schedule': settings.MANAGE_BOT_INTERVAL,
+        # Ticks queued behind a long tick are dropped instead of running back-to-back
+        'options': {'expires': settings.MANAGE_BOT_INTERVAL},
     }
 }
 
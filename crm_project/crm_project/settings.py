@@ -41,12 +41,44 @@ TEMPLATES = [
     },
 ]
 WSGI_APPLICATION = 'crm_project.wsgi.application'
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# База данных. Веб, celery-воркеры и демон бота пишут одновременно:
+# SQLite работает в режиме WAL (читатели не блокируют писателя), транзакции
+# сразу берут блокировку записи (IMMEDIATE), а конкурирующий писатель ждет
+# DB_TIMEOUT секунд вместо ошибки "database is locked".
+# DB_ENGINE=postgresql включает PostgreSQL с пулом соединений (psycopg 3)
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+DB_TIMEOUT = float(os.getenv('DB_TIMEOUT', '20'))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'crm'),
+            'USER': os.getenv('POSTGRES_USER', 'crm'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                    'timeout': DB_TIMEOUT,
+                },
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': DB_TIMEOUT,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': 'PRAGMA journal_mode=WAL;PRAGMA synchronous=NORMAL;',
+            },
+        }
     }
-}
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -81,7 +113,7 @@ STATICFILES_DIRS = [
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Настройки Celery
-CELERY_BROKER_URL = 'redis://redis:6379/0'
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
@@ -105,40 +137,142 @@ IB_HOST = os.getenv('IB_HOST', 'host.docker.internal')
 IB_PORT = int(os.getenv('IB_PORT', '4002'))
 IB_CLIENT_ID = int(os.getenv('IB_CLIENT_ID', '1234'))
 
+# Redis для обмена состоянием между процессами бота
+REDIS_URL = os.getenv('REDIS_URL', CELERY_BROKER_URL)
+
+# Резидентный режим бота: одна постоянная сессия IB вместо подключения
+# на каждый тик Celery. Задача manage_bot в этом режиме только будит демон.
+BOT_DAEMON_ENABLED = os.getenv('BOT_DAEMON_ENABLED', '0') == '1'
+# Демон просыпается точно ко времени входа/выхода сигналов; этот интервал -
+# только страховочный проход на случай пропущенных изменений
+BOT_DAEMON_TICK_INTERVAL = float(os.getenv('BOT_DAEMON_TICK_INTERVAL', '60'))
+# Через сколько секунд повторить вход, который не удался (контракт, размещение)
+BOT_DAEMON_RETRY_DELAY = float(os.getenv('BOT_DAEMON_RETRY_DELAY', '15'))
+BOT_DAEMON_RECONNECT_MIN_DELAY = float(os.getenv('BOT_DAEMON_RECONNECT_MIN_DELAY', '1'))
+BOT_DAEMON_RECONNECT_MAX_DELAY = float(os.getenv('BOT_DAEMON_RECONNECT_MAX_DELAY', '60'))
+BOT_DAEMON_WAKE_KEY = 'trading_bot:daemon:wake'
+BOT_DAEMON_HEARTBEAT_KEY = 'trading_bot:daemon:heartbeat'
+
+# Кэш флага работы бота (BotState): в процессе BOT_STATE_CACHE_TTL сек, в
+# Redis - BOT_STATE_CACHE_SHARED_TTL сек. Переключение записывается в кэш сразу
+BOT_STATE_CACHE_KEY = 'trading_bot:bot_state'
+BOT_STATE_CACHE_TTL = float(os.getenv('BOT_STATE_CACHE_TTL', '5'))
+BOT_STATE_CACHE_SHARED_TTL = float(os.getenv('BOT_STATE_CACHE_SHARED_TTL', '300'))
+
+# Аренда тика бота в Redis: пока тик держит аренду, следующие тики
+# пропускаются. Срок аренды продлевается перед отправкой ордеров, сек
+BOT_TICK_LEASE_KEY = 'trading_bot:tick:lease'
+BOT_TICK_LEASE_TTL = float(os.getenv('BOT_TICK_LEASE_TTL', '120'))
+
+# Планировщик событий входа/выхода: горизонт и период полной перестройки, сек
+BOT_SCHEDULER_HORIZON = float(os.getenv('BOT_SCHEDULER_HORIZON', str(24 * 60 * 60)))
+BOT_SCHEDULER_REBUILD_INTERVAL = float(os.getenv('BOT_SCHEDULER_REBUILD_INTERVAL', str(60 * 60)))
+BOT_SCHEDULER_DIRTY_KEY = 'trading_bot:scheduler:dirty'
+
+# Периоды задач celery beat, сек. При работающем демоне manage_bot - только
+# страховочный проход
+CHECK_SIGNALS_INTERVAL = float(os.getenv('CHECK_SIGNALS_INTERVAL', '15'))
+MANAGE_BOT_INTERVAL = float(
+    os.getenv('MANAGE_BOT_INTERVAL', str(BOT_DAEMON_TICK_INTERVAL if BOT_DAEMON_ENABLED else 15))
+)
+
+# Синхронизация сигналов: check_signals обрабатывает только SeasonalSignal,
+# измененные после прошлого запуска (с запасом SIGNAL_SYNC_OVERLAP), и раз в
+# SIGNAL_FULL_SYNC_INTERVAL делает полную сверку, сек
+SIGNAL_SYNC_OVERLAP = float(os.getenv('SIGNAL_SYNC_OVERLAP', '60'))
+SIGNAL_FULL_SYNC_INTERVAL = float(os.getenv('SIGNAL_FULL_SYNC_INTERVAL', str(24 * 60 * 60)))
+
+# Кэш контрактов (ContractDetails) между тиками бота
+BOT_CONTRACT_CACHE_TTL = float(os.getenv('BOT_CONTRACT_CACHE_TTL', str(6 * 60 * 60)))
+BOT_CONTRACT_CACHE_MAX_ENTRIES = int(os.getenv('BOT_CONTRACT_CACHE_MAX_ENTRIES', '512'))
+
+# Асинхронный движок сигналов: параллельная обработка с ограничением
+BOT_ASYNC_ENGINE = os.getenv('BOT_ASYNC_ENGINE', '0') == '1'
+BOT_MAX_CONCURRENCY = int(os.getenv('BOT_MAX_CONCURRENCY', '8'))
+
+# Ограничение частоты запросов к IB Gateway: сообщений в секунду на все запросы
+# (лимит IB - 50) и собственные лимиты классов запросов (запросов в секунду,
+# размер пачки). Исторические данные: не больше 60 запросов за 10 минут и 6 подряд
+BOT_PACING_MESSAGES = float(os.getenv('BOT_PACING_MESSAGES', '40'))
+BOT_PACING_LIMITS = {
+    'historical': (60 / 600, 6),
+}
+
+# Источники цены для входа в позицию (по порядку) и допустимый возраст цены, сек
+BOT_PRICE_SOURCES = os.getenv('BOT_PRICE_SOURCES', 'snapshot,bars').split(',')
+BOT_PRICE_MAX_AGE = float(os.getenv('BOT_PRICE_MAX_AGE', '5'))
+
+# Допустимый возраст значений счета (NetLiquidation и др.) из потока обновлений, сек
+BOT_ACCOUNT_MAX_AGE = float(os.getenv('BOT_ACCOUNT_MAX_AGE', '300'))
+
+# Часы IB Gateway: период опроса reqCurrentTime (сек), число замеров для оценки
+# смещения/дрейфа и допустимое расхождение с локальными часами (сек)
+BOT_CLOCK_SAMPLE_INTERVAL = float(os.getenv('BOT_CLOCK_SAMPLE_INTERVAL', '300'))
+BOT_CLOCK_WINDOW = int(os.getenv('BOT_CLOCK_WINDOW', '12'))
+BOT_CLOCK_MAX_SKEW = float(os.getenv('BOT_CLOCK_MAX_SKEW', '2'))
+
+# Метрики задержек в формате Prometheus: порт /metrics процесса бота (0 - выкл.);
+# веб-приложение отдает последний снимок из Redis по /trading_bot/metrics/
+BOT_METRICS_PORT = int(os.getenv('BOT_METRICS_PORT', '0'))
+BOT_METRICS_SNAPSHOT_KEY = 'trading_bot:metrics'
+# Адреса, с которых Prometheus может забирать /trading_bot/metrics/ (только для сбора метрик)
+BOT_METRICS_ALLOWED_IPS = os.getenv('BOT_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
 # Настройки логирования
+# Подробная трассировка шагов бота (DEBUG); переключается и во время работы
+# командой bot_trace
+BOT_LOG_TRACE = os.getenv('BOT_LOG_TRACE', '0') == '1'
+BOT_LOG_TRACE_KEY = 'trading_bot:log:trace'
+# Формат логов: text или json
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'context': {
+            '()': 'trading_bot.structured_logging.ContextFilter',
+        },
+    },
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {message}',
+            'format': '{levelname} {asctime} {message}{context}',
             'style': '{',
         },
         'simple': {
             'format': '{levelname} {asctime} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'trading_bot.structured_logging.JsonFormatter',
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+        },
+        # Запись в поток выполняется отдельным потоком, бот не ждет вывода
+        'queue': {
+            'class': 'trading_bot.structured_logging.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console'],
+            'filters': ['context'],
         },
     },
     'loggers': {
         'trading_bot': {
-            'handlers': ['console'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'level': 'DEBUG' if BOT_LOG_TRACE else 'INFO',
             'propagate': False,
         },
         'trading_bot.core.bot_signal_manager': {
-            'handlers': ['console'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'level': 'DEBUG' if BOT_LOG_TRACE else 'INFO',
             'propagate': False,
         },
         'bot': {
-            'handlers': ['console'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'level': 'DEBUG' if BOT_LOG_TRACE else 'INFO',
             'propagate': False,
         },
     },
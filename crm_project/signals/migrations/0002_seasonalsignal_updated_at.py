@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signals', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seasonalsignal',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated'),
+        ),
+    ]
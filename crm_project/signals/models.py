@@ -86,6 +86,11 @@ class SeasonalSignal(Signal):
     )
     open_time = models.TimeField()
     close_time = models.TimeField()
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Updated'
+    )
 
     class Meta(Signal.Meta):
         abstract = False
@@ -0,0 +1,120 @@
+"""
+In-memory store of streamed account values
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from ib_insync import AccountValue, IB
+
+logger = logging.getLogger('trading_bot.core.bot_signal_manager')
+
+# Account tags kept in the store
+TRACKED_TAGS = (
+    'NetLiquidation',
+    'TotalCashValue',
+    'AvailableFunds',
+    'ExcessLiquidity',
+    'BuyingPower',
+    'InitMarginReq',
+    'MaintMarginReq',
+)
+
+
+class AccountValueStore:
+    """
+    Keeps the latest value of tracked account tags with a timestamp.
+
+    Values arrive through the account updates stream that ib_insync opens on
+    connect (accountValueEvent) and through the account summary subscription
+    (accountSummaryEvent). A blocking fetch is done only when the stored
+    value is older than the freshness bound.
+    """
+
+    def __init__(self, ib_connector: IB, max_age: float = None):
+        """
+        Args:
+            ib_connector: IB instance to subscribe to
+            max_age: Freshness bound in seconds
+        """
+        self.ib_connector = ib_connector
+        self.max_age = max_age or settings.BOT_ACCOUNT_MAX_AGE
+        self._values: dict[str, tuple[float, str, float]] = {}
+        ib_connector.accountValueEvent += self._on_account_value
+        ib_connector.accountSummaryEvent += self._on_account_value
+        for value in ib_connector.accountValues():
+            self._on_account_value(value)
+
+    def _on_account_value(self, value: AccountValue) -> None:
+        if value.tag not in TRACKED_TAGS or value.currency in ('', 'BASE'):
+            return
+        try:
+            self._values[value.tag] = (float(value.value), value.currency, time.time())
+        except ValueError:
+            pass
+
+    def get(self, tag: str, max_age: float = None) -> float | None:
+        """
+        Returns:
+            float | None: Stored value if it is fresh enough
+        """
+        entry = self._values.get(tag)
+        if entry is None:
+            return None
+        value, _, updated_at = entry
+        if time.time() - updated_at > (self.max_age if max_age is None else max_age):
+            return None
+        return value
+
+    def age(self, tag: str) -> float | None:
+        """
+        Returns:
+            float | None: Seconds since the tag was last updated
+        """
+        entry = self._values.get(tag)
+        return None if entry is None else time.time() - entry[2]
+
+    def net_liquidation(self) -> float:
+        """
+        NetLiquidation for position sizing, fetched only if the stream is stale
+        """
+        value = self.get('NetLiquidation')
+        if value is not None:
+            return value
+        logger.info("Account values are stale, requesting account summary")
+        self._store_summary(self.ib_connector.accountSummary())
+        return self._require('NetLiquidation')
+
+    async def net_liquidation_async(self) -> float:
+        """
+        Asynchronous counterpart of net_liquidation
+        """
+        value = self.get('NetLiquidation')
+        if value is not None:
+            return value
+        logger.info("Account values are stale, requesting account summary")
+        self._store_summary(await self.ib_connector.accountSummaryAsync())
+        return self._require('NetLiquidation')
+
+    def _store_summary(self, summary: list[AccountValue]) -> None:
+        for value in summary:
+            self._on_account_value(value)
+
+    def _require(self, tag: str) -> float:
+        entry = self._values.get(tag)
+        if entry is None:
+            raise Exception(f"{tag} not found in account summary")
+        return entry[0]
+
+
+def get_account_store(ib_connector: IB) -> AccountValueStore:
+    """
+    Returns the store subscribed to the given IB instance, creating it once
+    so that re-created signal managers do not stack event handlers (stored on
+    the instance and freed with it)
+    """
+    store = vars(ib_connector).get('_account_store')
+    if store is None:
+        store = ib_connector._account_store = AccountValueStore(ib_connector)
+    return store
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TradingBotConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "trading_bot"
+
+    def ready(self):
+        from trading_bot import receivers  # noqa: F401
@@ -0,0 +1,273 @@
+"""
+Asynchronous signal engine built on the ib_insync async API
+"""
+
+import asyncio
+import dataclasses
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from ib_insync import ContFuture, ContractDetails, IB
+
+from trading_bot.bot_signal_manager import (
+    BotSignalManager,
+    MAX_RETRIES,
+    ORDER_FIELDS,
+    RETRY_DELAY,
+    STATUS_FIELDS,
+)
+from trading_bot import metrics
+from trading_bot.contract_cache import contract_cache
+from trading_bot.models import BotSeasonalSignal, TradeStatus
+from trading_bot.portfolio import PortfolioSnapshot
+from trading_bot.request_scheduler import Priority, request_priority
+from trading_bot.structured_logging import log_context, refresh_tracing
+from trading_bot.tick_lock import check_fence
+
+logger = logging.getLogger('trading_bot.core.bot_signal_manager')
+
+
+@dataclasses.dataclass
+class SignalResult:
+    """Outcome of processing one signal in a tick"""
+    signal_id: int
+    action: str  # "skip", "open", "close"
+    ok: bool
+    elapsed: float
+    error: str | None = None
+
+
+class AsyncBotSignalManager(BotSignalManager):
+    """
+    Processes due signals concurrently on the IB event loop.
+
+    A slow symbol (historical data timeout, contract retries) only delays
+    its own signal: tick wall time approaches the slowest signal instead of
+    the sum of all of them. Concurrency is bounded by a semaphore.
+    """
+
+    def __init__(self, ib_connector: IB, max_concurrency: int = None, **kwargs):
+        """
+        Args:
+            ib_connector: Connected IB instance
+            max_concurrency: Maximum number of signals processed at once
+        """
+        super().__init__(ib_connector, **kwargs)
+        self.max_concurrency = max_concurrency or settings.BOT_MAX_CONCURRENCY
+        self.cached_contracts: dict[tuple, ContractDetails] = {}
+
+    def manage_signals(self) -> list[SignalResult]:
+        """
+        Runs one asynchronous tick on the IB event loop
+        """
+        with metrics.tick_seconds.time():
+            return self.ib_connector.run(self.manage_signals_async())
+
+    async def manage_signals_async(self) -> list[SignalResult]:
+        """
+        Managing trading bot signals concurrently
+
+        Returns:
+            list[SignalResult]: Per-signal results of the tick
+        """
+        await sync_to_async(refresh_tracing)()
+        self.gateway.new_tick()
+        self.retries = {}
+        self.logger.info("Starting manage_signals_async method")
+        await self.clock.refresh_if_stale_async()
+        self.current_time = self.clock.now()
+
+        await sync_to_async(self._expire_missed_entries)(self.current_time)
+        signals = await sync_to_async(list)(self.get_actionable_signals(self.current_time))
+        self.logger.info("Found actionable signals: %d", len(signals))
+        # The cache may go to Redis: look up all contracts once, off the loop
+        self.cached_contracts = await sync_to_async(self._load_cached_contracts)(signals)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(signal: BotSeasonalSignal):
+            async with semaphore:
+                with log_context(signal=signal.pk, symbol=signal.signal.symbol.financial_instrument):
+                    return await self._handle_signal_async(signal)
+
+        outcomes = await asyncio.gather(*(run(signal) for signal in signals))
+        results = [result for result, _ in outcomes if result is not None]
+        entries, exits = [], []
+        for signal, (_, contract) in zip(signals, outcomes):
+            if contract is not None:
+                (exits if signal.order_id else entries).append((signal, contract))
+
+        # Exits go first; both use one snapshot/lookup for the whole tick
+        if entries or exits:
+            await sync_to_async(check_fence)()
+        if exits:
+            results.extend(await self.close_positions_batch_async(exits))
+        if entries:
+            results.extend(await self.open_orders_batch_async(entries))
+
+        failed = [result for result in results if not result.ok]
+        self.logger.info(
+            "Finishing manage_signals_async method: %d processed, %d failed",
+            len(results), len(failed),
+        )
+        for result in failed:
+            self.logger.warning(
+                "Signal %s %s failed: %s", result.signal_id, result.action, result.error
+            )
+        return results
+
+    async def _handle_signal_async(self, _signal: BotSeasonalSignal):
+        """
+        Asynchronous counterpart of _handle_signal
+
+        Args:
+            _signal: Объект BotSeasonalSignal
+
+        Returns:
+            tuple: (SignalResult, None) if the signal was handled, or
+            (None, ContractDetails) if it is ready to be entered or exited in
+            the batch
+        """
+        started = time.monotonic()
+        action = "skip"
+        due = False
+        try:
+            entry_time = timezone.localtime(_signal.entry_date)
+            exit_time = timezone.localtime(_signal.exit_date)
+            entry_due = not _signal.order_id and self.current_time >= entry_time
+            exit_due = self.current_time >= exit_time and _signal.status != TradeStatus.CLOSE
+            due = entry_due or exit_due
+            if not due:
+                return SignalResult(_signal.pk, action, True, time.monotonic() - started), None
+
+            action = "open" if entry_due else "close"
+            with request_priority(Priority.ENTRY if entry_due else Priority.EXIT):
+                contract = await self._get_contract_async(_signal)
+            if not contract:
+                raise Exception(f"Failed to get contract for signal {_signal.pk}")
+
+            if entry_due and not self._is_trading_time(contract):
+                self.logger.info("Market is closed, entry postponed")
+                self.retry_later(_signal, self._next_open(contract))
+                return SignalResult(_signal.pk, "skip", True, time.monotonic() - started), None
+            return None, contract
+        except Exception as e:
+            self.logger.error("Error processing signal: %s", e, exc_info=True)
+            if due:
+                self.retry_later(_signal)
+            return SignalResult(_signal.pk, action, False, time.monotonic() - started, str(e)), None
+
+    async def open_orders_batch_async(self, entries) -> list[SignalResult]:
+        """
+        Asynchronous counterpart of open_orders_batch
+
+        Args:
+            entries: (signal, contract details) pairs ready to be entered
+
+        Returns:
+            list[SignalResult]: Result per entered signal
+        """
+        started = time.monotonic()
+        with request_priority(Priority.ENTRY):
+            placed = await self._place_brackets_async(entries)
+        elapsed = time.monotonic() - started
+        results = []
+        saved = []
+        for result in placed:
+            if not result.error:
+                with log_context(signal=result.signal.pk):
+                    self._save_bracket(result.signal, result.bracket, result.trade, result.stop_trade)
+                saved.append(result.signal)
+            else:
+                self.retry_later(result.signal)
+            results.append(SignalResult(
+                result.signal.pk, "open", result.error is None, elapsed, result.error
+            ))
+        await sync_to_async(self._save_signals)(saved, ORDER_FIELDS)
+        return results
+
+    async def close_positions_batch_async(self, exits) -> list[SignalResult]:
+        """
+        Asynchronous counterpart of close_positions_batch
+
+        Args:
+            exits: (signal, contract details) pairs with due exits
+
+        Returns:
+            list[SignalResult]: Result per exited signal
+        """
+        started = time.monotonic()
+        with request_priority(Priority.EXIT):
+            with metrics.close_stage_seconds.time(stage="snapshot"):
+                snapshot = await PortfolioSnapshot.load_async(self.gateway)
+            closed = await self._close_positions_async(exits, snapshot)
+        elapsed = time.monotonic() - started
+        for signal, _ in exits:
+            signal.status = TradeStatus.CLOSE
+        await sync_to_async(self._save_signals)([signal for signal, _ in exits], STATUS_FIELDS)
+        results = []
+        for (signal, _), filled in zip(exits, closed):
+            self.logger.info("Signal %s closed", signal.pk)
+            results.append(SignalResult(
+                signal.pk, "close", filled, elapsed, None if filled else "Position not closed by a fill"
+            ))
+        return results
+
+    @staticmethod
+    def _load_cached_contracts(signals: list[BotSeasonalSignal]) -> dict[tuple, ContractDetails]:
+        """
+        Cached contract details of the symbols of the given signals
+
+        Returns:
+            dict: Details by (financial_instrument, exchange), misses left out
+        """
+        cached = {}
+        for cache_key in {(s.signal.symbol.financial_instrument, s.signal.symbol.exchange) for s in signals}:
+            with metrics.contract_lookup_seconds.time(source="cache"):
+                details = contract_cache.get(cache_key)
+            if details is not None:
+                cached[cache_key] = details
+        return cached
+
+    async def _get_contract_async(self, _signal: BotSeasonalSignal):
+        """
+        Asynchronous counterpart of _get_contract, served from the contracts
+        looked up at the start of the tick
+        """
+        symbol = _signal.signal.symbol
+        cache_key = (symbol.financial_instrument, symbol.exchange)
+        details = self.cached_contracts.get(cache_key)
+        if details is not None:
+            return details
+
+        contract = ContFuture(
+            symbol=symbol.financial_instrument,
+            exchange=symbol.exchange,
+        )
+        with metrics.contract_lookup_seconds.time(source="gateway"):
+            details = await self._request_contract_details_async(cache_key, contract)
+        if details is None:
+            metrics.contract_lookup_failures.inc()
+        return details
+
+    async def _request_contract_details_async(self, cache_key: tuple, contract: ContFuture):
+        """
+        Asynchronous counterpart of _request_contract_details
+        """
+        for attempt in range(MAX_RETRIES):
+            try:
+                details = await self.gateway.reqContractDetailsAsync(contract)
+                if details:
+                    await sync_to_async(contract_cache.put)(cache_key, details[0])
+                    return details[0]
+                self.logger.warning(
+                    "Contract details not found for %s (%d/%d)", cache_key, attempt + 1, MAX_RETRIES
+                )
+            except Exception as e:
+                self.logger.error("Error getting contract details: %s", e)
+            if attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(RETRY_DELAY)
+        return None
@@ -10,6 +10,7 @@ import random
 import django
 from ib_insync import IB, util
 from trading_bot.bot_signal_manager import BotSignalManager
+from trading_bot import metrics
 from django.conf import settings
 
 # Configure Django
@@ -23,6 +24,16 @@ logger = logging.getLogger("bot")
 util.logToConsole(level=logging.WARNING)
 
 
+def create_signal_manager(ib: IB) -> BotSignalManager:
+    """
+    Creates the signal manager selected by settings.BOT_ASYNC_ENGINE
+    """
+    if settings.BOT_ASYNC_ENGINE:
+        from trading_bot.async_signal_manager import AsyncBotSignalManager
+        return AsyncBotSignalManager(ib)
+    return BotSignalManager(ib)
+
+
 class TradingBot:
     """
     Class for working with Interactive Brokers Gateway
@@ -42,7 +53,8 @@ class TradingBot:
         Args:
             host: IB Gateway host
             port: IB Gateway port
-            client_id: Client ID
+            client_id: Client ID (random if not set, so that overlapping
+                one-shot runs do not collide)
             max_retries: Maximum number of connection attempts
             retry_delay: Delay between attempts in seconds
         """
@@ -53,7 +65,7 @@ class TradingBot:
         self.connected = False
         self.host = host or settings.IB_HOST
         self.port = port or settings.IB_PORT
-        self.client_id = random.randint(100, 9999)
+        self.client_id = client_id or random.randint(100, 9999)
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.signal_manager = None
@@ -105,7 +117,7 @@ class TradingBot:
                 return
 
             logger.info("Initializing signal manager...")
-            self.signal_manager = BotSignalManager(self.ib)
+            self.signal_manager = create_signal_manager(self.ib)
             logger.info("Signal manager successfully initialized")
 
             logger.info("Bot is running and waiting for signals...")
@@ -117,6 +129,7 @@ class TradingBot:
             logger.error(f"Critical error in bot: {str(e)}")
         finally:
             self.disconnect()
+            metrics.registry.publish()
 
 
 # Create global bot instance
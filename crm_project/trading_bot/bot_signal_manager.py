@@ -5,17 +5,33 @@ Module for managing trading bot positions
 import logging
 from typing import TYPE_CHECKING
 
+import asyncio
 from datetime import datetime, timedelta
 import dataclasses
-from zoneinfo import ZoneInfo
-import pytz
-import time
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
-from ib_insync import LimitOrder, StopOrder, ContFuture, IB, util, MarketOrder
+from ib_insync import LimitOrder, StopOrder, ContFuture, ContractDetails, IB, util, MarketOrder, Trade
 
-from crm_project.settings import TIME_ZONE
+from trading_bot.account_store import get_account_store
+from trading_bot.coalescing import get_request_coalescer
+from trading_bot.contract_cache import contract_cache
+from trading_bot.gateway_clock import get_gateway_clock
+from trading_bot import metrics
 from trading_bot.models import BotSeasonalSignal, TradeStatus
+from trading_bot.order_confirmation import (
+    ConfirmationTimeout,
+    wait_for_confirmation,
+    wait_for_fill,
+)
+from trading_bot.portfolio import PortfolioSnapshot
+from trading_bot.price_provider import PriceProvider
+from trading_bot.request_scheduler import Priority, request_priority
+from trading_bot.structured_logging import log_context, refresh_tracing
+from trading_bot.tick_lock import check_fence
+from trading_bot.trading_calendar import trading_calendars
 
 if TYPE_CHECKING:
     pass
@@ -32,14 +48,36 @@ ORDER_TIMEOUT = 20  # Timeout for order operations
 CONTRACT_DETAILS_TIMEOUT = 15  # Timeout for contract details
 MAX_RETRIES = 3  # Maximum retry attempts
 RETRY_DELAY = 5  # Delay between retries in seconds
+CLOSE_FILL_TIMEOUT = 10  # Timeout for a closing market order to fill
+
+# Columns written after order entry and after close
+ORDER_FIELDS = ['order_id', 'stop_order_id', 'updated_at']
+STATUS_FIELDS = ['status', 'updated_at']
+
+
+@dataclasses.dataclass
+class BracketOrder:
+    """Parent limit order with its protective stop order"""
+    limit_order: LimitOrder
+    stop_order: StopOrder
+    entry_price: float
+    stoploss: float
+    lots: int
+    activation_time: str
 
 
 @dataclasses.dataclass
-class TradingHours:
-    status: str
-    start: datetime
-    end: datetime
+class PlacedBracket:
+    """Result of placing a bracket for one signal"""
+    signal: BotSeasonalSignal
+    bracket: BracketOrder | None = None
+    trade: Trade | None = None
+    stop_trade: Trade | None = None
+    error: str | None = None
+
 
+# Compiled calendars belong to a conId, drop them when the contract rolls
+contract_cache.add_roll_listener(trading_calendars.on_contract_roll)
 
 
 class BotSignalManager:
@@ -47,130 +85,229 @@ class BotSignalManager:
     Класс для управления сигналами торгового бота
     """
 
-    def __init__(self, ib_connector: IB):
+    def __init__(self, ib_connector: IB, price_provider: PriceProvider = None):
         self.ib_connector = ib_connector
+        # Duplicate contract and bar requests of one tick share a single call
+        self.gateway = get_request_coalescer(ib_connector)
+        self.price_provider = price_provider or PriceProvider(self.gateway)
+        self.clock = get_gateway_clock(self.gateway)
+        # Signals whose due work did not happen in the last tick, with the
+        # moment to try again (read by the daemon to schedule a wake-up)
+        self.retries: dict[int, datetime] = {}
         self.logger = logger  # Используем тот же логгер
 
     def get_current_time(self) -> datetime:
         """
-        Получение текущего времени от IB Gateway
+        Получение текущего времени IB Gateway по оценке смещения часов;
+        запрос к шлюзу выполняется только раз в BOT_CLOCK_SAMPLE_INTERVAL
         """
-        current_time = self.ib_connector.reqCurrentTime()
-        
-        return current_time.astimezone(ZoneInfo(TIME_ZONE))
+        self.clock.refresh_if_stale()
+        return self.clock.now()
 
     def manage_signals(self) -> None:
         """
         Managing trading bot signals
         """
+        refresh_tracing()
+        self.gateway.new_tick()
+        self.retries = {}
         self.logger.info("Starting manage_signals method")
         try:
-            self.logger.info("Getting all signals from database")
-            signals = BotSeasonalSignal.objects.all(
-                # exit_date__gt=timezone.now()
-            ).select_related("signal", "signal__symbol")
+            with metrics.tick_seconds.time():
+                self._manage_signals()
+        except Exception as e:
+            self.logger.error("Error in manage_signals method: %s", e)
+            raise
 
-            self.logger.info(f"Found signals: {signals.count()}")
-            self.current_time = self.get_current_time()
+    def _manage_signals(self) -> None:
+        """
+        One tick: expire missed entries, then exit and enter due signals
+        """
+        self.current_time = self.get_current_time()
+
+        if self.current_time is None:
+            self.logger.error("Failed to get current time")
+            return
+
+        self._expire_missed_entries(self.current_time)
+        signals = list(self.get_actionable_signals(self.current_time))
+        self.logger.info("Found actionable signals: %d", len(signals))
+
+        entries, exits = [], []
+        for signal in signals:
+            with log_context(signal=signal.pk, symbol=signal.signal.symbol.financial_instrument):
+                contract = self._handle_signal(signal)
+            if contract is not None:
+                (exits if signal.order_id else entries).append((signal, contract))
+
+        # Exits go first; both use one snapshot/lookup for the whole tick
+        if entries or exits:
+            check_fence()
+        if exits:
+            self.close_positions_batch(exits)
+        if entries:
+            self.open_orders_batch(entries)
+
+        self.logger.info("Finishing manage_signals method")
+
+    @staticmethod
+    def get_actionable_signals(now: datetime):
+        """
+        Signals that need gateway work at the given moment: entry is due and
+        no order was placed yet, or an order exists and the exit is due.
 
-            if self.current_time is None:
-                self.logger.error("Failed to get current time")
-                return
-            for signal in signals:
-                self._handle_signal(signal)
+        Args:
+            now: Current time
+
+        Returns:
+            QuerySet: Actionable BotSeasonalSignal rows
+        """
+        entry_due = Q(order_id__isnull=True, entry_date__lte=now, exit_date__gt=now)
+        exit_due = Q(order_id__isnull=False, exit_date__lte=now)
+        return (
+            BotSeasonalSignal.objects.filter(entry_due | exit_due)
+            .exclude(status=TradeStatus.CLOSE)
+            .select_related("signal", "signal__symbol")
+            .order_by("entry_date")
+        )
 
-            self.logger.info("Finishing manage_signals method")
+    def _expire_missed_entries(self, now: datetime) -> int:
+        """
+        Close signals whose whole entry window passed without an order.
 
-        except Exception as e:
-            self.logger.error(f"Error in manage_signals method: {str(e)}")
-            raise
+        There is no position to open or close for them anymore, so they are
+        closed in one query instead of being re-checked every tick.
+
+        Args:
+            now: Current time
+
+        Returns:
+            int: Number of closed signals
+        """
+        expired = BotSeasonalSignal.objects.filter(
+            order_id__isnull=True, exit_date__lte=now
+        ).exclude(status=TradeStatus.CLOSE).update(status=TradeStatus.CLOSE)
+        if expired:
+            self.logger.warning("Closed %d signals that missed their entry window", expired)
+        return expired
 
     def _handle_signal(self, _signal: BotSeasonalSignal):
         """
         Обработка отдельного сигнала
 
+        Due work is not executed here: the contract of a signal that should
+        be entered or exited now is returned to the caller, which places all
+        entries and exits of the tick in batches.
+
         Args:
             _signal: Объект BotSeasonalSignal
+
+        Returns:
+            ContractDetails | None: Contract details if the signal should be entered
+            or exited now
         """
+        due = False
         try:
-            self.logger.info("=" * 20 + f" Processing signal {_signal.id} " + "=" * 20)
+            self.logger.debug("Processing signal %s", _signal.pk)
             entry_time = timezone.localtime(_signal.entry_date)
             exit_time = timezone.localtime(_signal.exit_date)
-            contract = self._get_contract(_signal)
-            
-            if not _signal.order_id:
-                self.logger.info(f"Signal {_signal.pk} has no open order")
-
-                if self.current_time < entry_time:
-                    self.logger.info(f"Entry time not reached for signal {_signal.pk}")
-                    self.logger.info(f"Current time: {self.current_time} entry time: {entry_time}")
-                    return
-
-                self.logger.info(f"Entry time reached for signal {_signal.pk}")
-                self.logger.info("Getting contract...")
-
-                if not contract:
-                    self.logger.warning(f"Failed to get contract for signal {_signal.pk}")
-                    return
-
-                self.logger.info("Opening order...")
-                if not self._is_trading_time(contract):
-                    self.logger.info(f"Market is closed: {self.current_time}")
-                    self.logger.info(f"Entry time not reached for signal {_signal.pk}")
-                    return
-                try:
-                    self._open_order(_signal, contract.contract)
-                except Exception as e:
-                    self.logger.error(f"Error opening order: {str(e)}", exc_info=True)
-                    return
-
-            if self.current_time >= exit_time:
-                if _signal.status != TradeStatus.CLOSE:
-                    self.logger.info(f"Exit time reached for signal {_signal.pk}")
-                    self.check_and_close_position(_signal, _signal.order_id, contract)
-                    _signal.status = TradeStatus.CLOSE
-                    _signal.save()
-                    self.logger.info(f"Signal {_signal.pk} closed")
-            self.logger.info("=" * 20 + f" Finished processing signal {_signal.id} " + "=" * 20)
+            entry_due = not _signal.order_id and self.current_time >= entry_time
+            exit_due = self.current_time >= exit_time and _signal.status != TradeStatus.CLOSE
+            due = entry_due or exit_due
+            if not due:
+                self.logger.debug("Nothing to do for signal %s", _signal.pk)
+                return None
+
+            self.logger.info("%s time reached", "Entry" if entry_due else "Exit")
+            # Contract is resolved only for signals with due work
+            with request_priority(Priority.ENTRY if entry_due else Priority.EXIT):
+                contract = self._get_contract(_signal)
+            if not contract:
+                self.logger.warning("Failed to get contract")
+                self.retry_later(_signal)
+                return None
+
+            if entry_due and not self._is_trading_time(contract):
+                self.logger.info("Market is closed, entry postponed")
+                self.retry_later(_signal, self._next_open(contract))
+                return None
+            return contract
         except Exception as e:
-            self.logger.error(f"Error processing signal: {str(e)}", exc_info=True)
+            self.logger.error("Error processing signal: %s", e, exc_info=True)
+            if due:
+                self.retry_later(_signal)
+        return None
+
+    def retry_later(self, signal: BotSeasonalSignal, at: datetime = None) -> None:
+        """
+        Remember to process the signal again, BOT_DAEMON_RETRY_DELAY seconds
+        from now unless a moment is given
+        """
+        self.retries[signal.pk] = at or self.current_time + timedelta(seconds=settings.BOT_DAEMON_RETRY_DELAY)
+
+    def _next_open(self, contract_details: ContractDetails) -> datetime | None:
+        """
+        Returns:
+            datetime | None: Start of the next trading session, None if unknown
+        """
+        if not contract_details.tradingHours:
+            return None
+        calendar = trading_calendars.get(contract_details, self.current_time.date())
+        return calendar.next_open(self.current_time)
 
     def _get_contract(self, _signal: BotSeasonalSignal) -> ContFuture | None:
         """
         Создает объект контракта для запроса
 
+        Details are served from the contract cache; the gateway is asked
+        only on a miss, after TTL expiry or after the contract rolled.
+
         Args:
             _signal: Объект BotSeasonalSignal
 
         Returns:
             ContFuture: Объект контракта
         """
-        self.logger.info(f"Creating contract for signal {_signal.pk}")
-        self.logger.info(f"Symbol: {_signal.signal.symbol.financial_instrument}")
-        self.logger.info(f"Exchange: {_signal.signal.symbol.exchange}")
+        symbol = _signal.signal.symbol
+        cache_key = (symbol.financial_instrument, symbol.exchange)
+        with metrics.contract_lookup_seconds.time(source="cache"):
+            details = contract_cache.get(cache_key)
+        if details is not None:
+            return details
+
+        self.logger.info("Requesting contract %s on %s", symbol.financial_instrument, symbol.exchange)
 
         contract = ContFuture(
-            symbol=_signal.signal.symbol.financial_instrument,
-            exchange=_signal.signal.symbol.exchange,
+            symbol=symbol.financial_instrument,
+            exchange=symbol.exchange,
             #currency="USD",
         )
+        with metrics.contract_lookup_seconds.time(source="gateway"):
+            details = self._request_contract_details(cache_key, contract)
+        if details is None:
+            metrics.contract_lookup_failures.inc()
+        return details
 
-        # Get contract details with retries
+    def _request_contract_details(self, cache_key: tuple, contract: ContFuture) -> ContractDetails | None:
+        """
+        Get contract details with retries and store them in the cache
+        """
         for attempt in range(MAX_RETRIES):
             try:
-                self.logger.info(f"Attempting to get contract details ({attempt + 1}/{MAX_RETRIES})")
-                details = self.ib_connector.reqContractDetails(contract)
+                self.logger.debug("Attempting to get contract details (%d/%d)", attempt + 1, MAX_RETRIES)
+                details = self.gateway.reqContractDetails(contract)
                 if details:
+                    contract_cache.put(cache_key, details[0])
                     return details[0]
                 else:
                     self.logger.warning("Contract details not found")
                     if attempt < MAX_RETRIES - 1:
-                        time.sleep(RETRY_DELAY)
+                        self.ib_connector.sleep(RETRY_DELAY)
                     continue
             except Exception as e:
-                self.logger.error(f"Error getting contract details: {str(e)}")
+                self.logger.error("Error getting contract details: %s", e)
                 if attempt < MAX_RETRIES - 1:
-                    time.sleep(RETRY_DELAY)
+                    self.ib_connector.sleep(RETRY_DELAY)
                 continue
         return None
 
@@ -185,242 +322,270 @@ class BotSignalManager:
             bool: True если сейчас торговое время, False если нет
         """
         try:
-            trading_schedule = contract_details.tradingHours
-            if not trading_schedule:
+            if not contract_details.tradingHours:
                 self.logger.warning("No trading hours information available")
                 return False
-            trading_schedule = self.parse_data(contract_details)
-
-            for day in trading_schedule:
-                if day.status == "OPEN":
-                    self.logger.info(
-                        f"Trading hours open: {day.start} ({day.start.tzname()} UTC{day.start.strftime('%z')}) - "
-                        f"{day.end} ({day.end.tzname()} UTC{day.end.strftime('%z')}) "
-                        f"now {self.current_time} ({self.current_time.tzname()} UTC{self.current_time.strftime('%z')})"
+            with metrics.trading_hours_check_seconds.time():
+                calendar = trading_calendars.get(contract_details, self.current_time.date())
+                is_open = calendar.is_open(self.current_time)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                if is_open:
+                    self.logger.debug(
+                        "Within trading hours, session ends %s, current time %s",
+                        calendar.session_end(self.current_time), self.current_time,
                     )
-                    if self.current_time >= day.start and self.current_time <= day.end:
-                        self.logger.info(
-                            f"Current time is within trading hours! Session: {day.start} - {day.end}, current time: {self.current_time}"
-                        )
-                        return True
-            return False
+                else:
+                    self.logger.debug(
+                        "Market is closed, next session opens at %s",
+                        calendar.next_open(self.current_time),
+                    )
+            return is_open
 
         except Exception as e:
-            self.logger.error(f"Error checking trading hours: {str(e)}")
+            self.logger.error("Error checking trading hours: %s", e)
             raise (e)
-            return False
-        
-    def parse_data(self,contract_details) -> list:
-        trading_hours = []
-        data = contract_details.tradingHours
-        tz = contract_details.timeZoneId    
-        for entry in data.split(";"):
-            if not entry.strip():
-                continue
-                
-            parts = entry.split(":", 1)
 
-            data, status = parts
-            
-            if status == "CLOSED":
-                trading_hours.append(
-                    TradingHours(status="CLOSED", start=None, end=None)
-                )
-            else:
-                data = entry
-                start = datetime(
-                    year=int(data[0:4]),
-                    month=int(data[4:6]),
-                    day=int(data[6:8]),
-                    hour=int(data[9:11]),
-                    minute=int(data[11:13]),
-                    tzinfo=pytz.timezone(tz),
-                ).astimezone(pytz.UTC)
-                
-                end = datetime(
-                    year=int(data[14:18]),
-                    month=int(data[18:20]),
-                    day=int(data[20:22]),
-                    hour=int(data[23:25]),
-                    minute=int(data[25:27]),
-                    tzinfo=pytz.timezone(tz),
-                ).astimezone(pytz.UTC)
-                          
-                trading_hours.append(
-                    TradingHours(
-                        status="OPEN",
-                        start=start,
-                        end=end,
-                    )
-                )
-        return trading_hours
-
-    def _open_order(self, signal: BotSeasonalSignal, contract: ContFuture) -> None:
-        """Opens an order for the signal"""
-        try:
-            self.logger.info(f"[1] Starting to open order for signal {signal.pk}, contract {contract.symbol}")
-            self.logger.info("[2] Requesting historical data...")
-
-            # Get historical data with retries
-            bars = self.ib_connector.reqHistoricalData(
-                        contract,
-                        endDateTime='',
-                        durationStr='1 D',
-                        barSizeSetting='1 min',
-                        whatToShow='TRADES',
-                        useRTH=True,
-                        timeout=HISTORICAL_DATA_TIMEOUT
-                    )
-            if not bars:
-                raise Exception("Failed to get historical data")
+    def open_orders_batch(self, entries: list[tuple[BotSeasonalSignal, ContractDetails]]) -> list[PlacedBracket]:
+        """
+        Opens brackets for all signals entering in this tick
 
-            self.logger.info(f"[3] Received historical data: {len(bars)} bars")
+        Args:
+            entries: (signal, contract details) pairs ready to be entered
 
-            actual_price = float(bars[-1].close)
-            self.logger.info(f"[4] Calculated current price for {contract.symbol}: {actual_price}")
+        Returns:
+            list[PlacedBracket]: Placement result per signal
+        """
+        with request_priority(Priority.ENTRY):
+            results = self.ib_connector.run(self._place_brackets_async(entries))
+        with metrics.open_order_stage_seconds.time(stage="save"):
+            placed = []
+            for result in results:
+                with log_context(signal=result.signal.pk):
+                    if result.error:
+                        self.logger.error("[ERROR] Error opening order: %s", result.error)
+                        self.retry_later(result.signal)
+                        continue
+                    self._save_bracket(result.signal, result.bracket, result.trade, result.stop_trade)
+                    placed.append(result.signal)
+            self._save_signals(placed, ORDER_FIELDS)
+        return results
+
+    async def _place_brackets_async(self, entries: list[tuple[BotSeasonalSignal, ContractDetails]]) -> list[PlacedBracket]:
+        """
+        Places brackets for many signals with shared lookups.
 
-            parent_id = self.ib_connector.client.getReqId()
-            self.logger.info(f"[5] Got parent order ID: {parent_id}")
+        The balance is read once and the price once per contract. All parent
+        and child orders are sent before waiting for any acknowledgement,
+        then all confirmations are awaited together. Does not touch the
+        database, so it can run on the IB event loop.
 
-            entry_action = self.get_entry_direction(signal)
-            exit_action = self.get_exit_direction(signal)
-            self.logger.info(f"[6] Determined directions: entry={entry_action}, exit={exit_action}")
+        Placement is not retried within the tick: if the stop cannot be
+        placed, the untransmitted parent is cancelled and the signal stays
+        unentered, so the next tick enters it again until its entry window
+        closes.
 
-            # Create limit order
-            self.logger.info("[7] Creating limit order...")
-            limit_order = LimitOrder(
-                action=entry_action,
-                totalQuantity=1,  # Temporary value
-                lmtPrice=actual_price,
-                orderId=parent_id,
-            )
-            limit_order.tif = "GTC"
-            limit_order.transmit = False
-            # Set activation time
-            activation_time = (
-                timezone.now() + timedelta(minutes=5)
-                ).strftime('%Y%m%d-%H:%M:%S')
-            self.logger.info(f"Order activation time: {repr(activation_time)}")
-            limit_order.goodAfterTime = activation_time
-            self.logger.info(f"[8] Set order activation time: {activation_time}")
-
-            # Calculate stop loss
-            self.logger.info("[9] Calculating stop loss...")
-            stoploss = self.calculate_stoploss(signal, actual_price)
-            self.logger.info(f"[10] Calculated stop price: {stoploss}")
-
-            # Calculate position size
-            self.logger.info("[11] Calculating position size...")
-            balance = float(self.get_balance())
-            self.logger.info(f"[12] Got account balance: {balance}")
-
-            lots = self.calculate_position_size(
-                balance=balance,
-                entry_price=actual_price,
-                stop_loss=stoploss,
-                multiplier=float(contract.multiplier),
-                risk_percent=signal.signal.risk
-            )
-            self.logger.info(f"[13] Calculated position size: {lots} contracts")
+        Args:
+            entries: (signal, contract details) pairs ready to be entered
 
-            # Update order quantity
-            limit_order.totalQuantity = lots
-            self.logger.info("[14] Updated limit order quantity")
+        Returns:
+            list[PlacedBracket]: Placement result per signal, in input order
+        """
+        results = [PlacedBracket(signal=signal) for signal, _ in entries]
+        self.logger.info("[1] Opening orders for %d signals", len(entries))
+        stage_seconds = metrics.open_order_stage_seconds
 
-            # Place limit order with retries
-            trade = None
-            for attempt in range(MAX_RETRIES):
+        try:
+            with stage_seconds.time(stage="balance"):
+                balance = float(await get_account_store(self.gateway).net_liquidation_async())
+        except Exception as e:
+            metrics.open_order_errors.inc(len(results), stage="balance")
+            for result in results:
+                result.error = f"Failed to get account balance: {str(e)}"
+            return results
+        self.logger.debug("[12] Got account balance: %s", balance)
+
+        contracts = {details.contract.conId: details.contract for _, details in entries}
+        with stage_seconds.time(stage="price"):
+            prices = dict(zip(contracts, await asyncio.gather(
+                *(self.price_provider.get_price_async(contract) for contract in contracts.values()),
+                return_exceptions=True,
+            )))
+
+        for result, (signal, details) in zip(results, entries):
+            contract = details.contract
+            price = prices[contract.conId]
+            if isinstance(price, Exception):
+                metrics.open_order_errors.inc(stage="price")
+                result.error = str(price)
+                continue
+            with log_context(signal=signal.pk, symbol=contract.symbol):
+                self.logger.debug("[4] Current price: %s", price)
+                stage = "build"
                 try:
-                    self.logger.info(f"[15] Attempting to place limit order ({attempt + 1}/{MAX_RETRIES})...")
-                    trade = self.ib_connector.placeOrder(contract, limit_order)
-                    if trade:
-                        break
+                    with stage_seconds.time(stage=stage):
+                        result.bracket = self._build_bracket(signal, contract, float(price), balance)
+                    stage = "limit_placement"
+                    with stage_seconds.time(stage=stage):
+                        result.trade = await self.gateway.placeOrderAsync(contract, result.bracket.limit_order)
+                    self.logger.debug("[16] Limit order placed, ID: %s", result.trade.order.orderId)
+                    stage = "stop_placement"
+                    with stage_seconds.time(stage=stage):
+                        result.stop_trade = await self.gateway.placeOrderAsync(contract, result.bracket.stop_order)
+                    self.logger.debug("[20] Stop order placed, ID: %s", result.stop_trade.order.orderId)
                 except Exception as e:
-                    self.logger.error(f"Error placing limit order: {str(e)}")
-                    if attempt < MAX_RETRIES - 1:
-                        time.sleep(RETRY_DELAY)
-                    continue
+                    metrics.open_order_errors.inc(stage=stage)
+                    result.error = f"Failed to place bracket: {str(e)}"
+                    if result.trade is not None:
+                        await self._cancel_parent(result.trade)
+
+        placed = [result for result in results if result.stop_trade is not None]
+        self.logger.debug("Waiting for confirmations of %d brackets...", len(placed))
+        with stage_seconds.time(stage="confirmation"):
+            outcomes = await asyncio.gather(
+                *(wait_for_confirmation(self.ib_connector, [r.trade, r.stop_trade], ORDER_TIMEOUT)
+                  for r in placed),
+                return_exceptions=True,
+            )
+        for result, outcome in zip(placed, outcomes):
+            if isinstance(outcome, Exception):
+                metrics.open_order_errors.inc(stage="confirmation")
+            if isinstance(outcome, ConfirmationTimeout):
+                # The bracket is already at the gateway: keep the parent id so
+                # the signal is not entered twice on the next tick
+                self.logger.error("[ERROR] Signal %s: %s", result.signal.pk, outcome)
+            elif isinstance(outcome, Exception):
+                result.error = str(outcome)
+            self._log_order_status(result.stop_trade)
+        return results
+
+    async def _cancel_parent(self, trade: Trade) -> None:
+        """
+        Cancels a parent order whose stop could not be placed, so that it
+        does not stay at the gateway next to the one of the next tick
+        """
+        try:
+            with request_priority(Priority.STOP):
+                await self.gateway.cancelOrderAsync(trade.order)
+            self.logger.info("Cancelled parent order %s left without a stop", trade.order.orderId)
+        except Exception as e:
+            self.logger.error("Failed to cancel parent order %s: %s", trade.order.orderId, e)
 
-            if not trade:
-                raise Exception("Failed to place limit order after all attempts")
+    def _build_bracket(self, signal: BotSeasonalSignal, contract: ContFuture,
+                       actual_price: float, balance: float) -> BracketOrder:
+        """
+        Builds the parent limit order and its protective stop order
 
-            self.logger.info(f"[16] Limit order placed, ID: {trade.order.orderId}")
+        Args:
+            signal: Signal to enter
+            contract: Resolved futures contract
+            actual_price: Current price used as the limit price
+            balance: Account balance used for position sizing
 
-            # Create and place stop order with retries
-            self.logger.info("[17] Creating stop order...")
-            stop_order = StopOrder(
-                action=exit_action,
-                totalQuantity=lots,
-                stopPrice=stoploss,
-            )
-            stop_order.parentId = trade.order.orderId
-            stop_order.transmit = True
-            stop_order.tif = "GTC"
-            self.logger.info(f"[18] Linking stop order to parent order {trade.order.orderId}")
+        Returns:
+            BracketOrder: Orders ready to be placed, parent first
+        """
+        parent_id = self.ib_connector.client.getReqId()
+        self.logger.debug("[5] Got parent order ID: %s", parent_id)
+
+        entry_action = self.get_entry_direction(signal)
+        exit_action = self.get_exit_direction(signal)
+        self.logger.debug("[6] Determined directions: entry=%s, exit=%s", entry_action, exit_action)
+
+        # Create limit order
+        self.logger.debug("[7] Creating limit order...")
+        limit_order = LimitOrder(
+            action=entry_action,
+            totalQuantity=1,  # Temporary value
+            lmtPrice=actual_price,
+            orderId=parent_id,
+        )
+        limit_order.tif = "GTC"
+        limit_order.transmit = False
+        # Set activation time
+        activation_time = (
+            timezone.now() + timedelta(minutes=5)
+            ).strftime('%Y%m%d-%H:%M:%S')
+        limit_order.goodAfterTime = activation_time
+        self.logger.debug("[8] Set order activation time: %s", activation_time)
+
+        # Calculate stop loss
+        self.logger.debug("[9] Calculating stop loss...")
+        stoploss = self.calculate_stoploss(signal, actual_price)
+        self.logger.debug("[10] Calculated stop price: %s", stoploss)
+
+        lots = self.calculate_position_size(
+            balance=balance,
+            entry_price=actual_price,
+            stop_loss=stoploss,
+            multiplier=float(contract.multiplier),
+            risk_percent=signal.signal.risk
+        )
+        self.logger.debug("[13] Calculated position size: %s contracts", lots)
 
-            stop_trade = None
-            for attempt in range(MAX_RETRIES):
-                try:
-                    self.logger.info(f"[19] Attempting to place stop order ({attempt + 1}/{MAX_RETRIES})...")
-                    stop_trade = self.ib_connector.placeOrder(contract, stop_order)
-                    if stop_trade:
-                        break
-                except Exception as e:
-                    self.logger.error(f"Error placing stop order: {str(e)}")
-                    if attempt < MAX_RETRIES - 1:
-                        time.sleep(RETRY_DELAY)
-                    continue
+        # Update order quantity
+        limit_order.totalQuantity = lots
+        self.logger.debug("[14] Updated limit order quantity")
 
-            if not stop_trade:
-                raise Exception("Failed to place stop order after all attempts")
-
-            self.logger.info(f"[20] Stop order placed, ID: {stop_trade.order.orderId}")
-            self.ib_connector.sleep(1)
-
-            # Check status
-            status = stop_trade.orderStatus.status
-            self.logger.info(f"[DEBUG] Stop order status: {status}")
-
-            # Check order logs
-            if stop_trade.log:
-                for log in stop_trade.log:
-                    self.logger.info(f"[DEBUG] Stop order log: {log.message}")
-
-            self.logger.info("⏳ Waiting for order confirmations...")
-            while not trade.order.permId or not stop_trade.order.permId:
-                self.ib_connector.sleep(1)
-                self.ib_connector.reqOpenOrders()
-            # Save order ID in signal
-            signal.order_id = trade.order.orderId
-            signal.stop_order_id = stop_trade.order.permId
-            signal.save()
-            self.logger.info(f"[21] Saved order perm ID {trade.order} in signal {signal.pk}")
-            self.logger.info(
-                f"[DEBUG] StopOrder -> action={stop_order.action}, "
-                f"qty={stop_order.totalQuantity}, stopPrice={stop_order.auxPrice}, "
-                f"parentId={stop_order.parentId}, transmit={stop_order.transmit}"
-)
-            self.logger.info(f"""[22] ORDER PLACEMENT SUMMARY:
-            Symbol: {contract.symbol}
-            Direction: {entry_action}
-            Entry price: {actual_price}
-            Stop loss: {stoploss}
-            Quantity: {lots}
-            Limit order ID: {trade.order.orderId}
-            Stop order ID: {stop_trade.order.orderId}
-            Activation time: {activation_time}
-            """)
+        self.logger.debug("[17] Creating stop order...")
+        stop_order = StopOrder(
+            action=exit_action,
+            totalQuantity=lots,
+            stopPrice=stoploss,
+        )
+        stop_order.parentId = parent_id
+        stop_order.transmit = True
+        stop_order.tif = "GTC"
+        self.logger.debug("[18] Linking stop order to parent order %s", parent_id)
+
+        return BracketOrder(
+            limit_order=limit_order,
+            stop_order=stop_order,
+            entry_price=actual_price,
+            stoploss=stoploss,
+            lots=lots,
+            activation_time=activation_time,
+        )
 
-        except Exception as e:
-            self.logger.error(f"[ERROR] Error opening order: {str(e)}", exc_info=True)
-            raise
+    def _log_order_status(self, trade: Trade) -> None:
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        self.logger.debug("Order %s status: %s", trade.order.orderId, trade.orderStatus.status)
+        for log in trade.log:
+            self.logger.debug("Order %s log: %s", trade.order.orderId, log.message)
+
+    @staticmethod
+    def _save_signals(signals: list[BotSeasonalSignal], update_fields: list[str]) -> None:
+        """
+        Saves the rows of one batch in a single write transaction instead
+        of one transaction per row
+        """
+        if not signals:
+            return
+        with transaction.atomic():
+            for signal in signals:
+                signal.save(update_fields=update_fields)
+
+    def _save_bracket(self, signal: BotSeasonalSignal, bracket: BracketOrder,
+                      trade: Trade, stop_trade: Trade) -> None:
+        """
+        Stores confirmed order ids in the signal (caller saves the row)
+        """
+        signal.order_id = trade.order.orderId
+        signal.stop_order_id = stop_trade.order.permId or None
+        stop_order = stop_trade.order
+        self.logger.debug("[21] Saved order ids %s/%s in signal %s", signal.order_id, signal.stop_order_id, signal.pk)
+        self.logger.info(
+            "[22] Order placed: %s %s %s @ %s, stop %s, limit id %s, stop id %s, active after %s",
+            bracket.limit_order.action, bracket.lots, trade.contract.symbol,
+            bracket.entry_price, bracket.stoploss, trade.order.orderId,
+            stop_order.orderId, bracket.activation_time,
+        )
 
     def get_balance(self) -> float:
-        account_summary = self.ib_connector.accountSummary()
-        net_liquidation_values = [val for val in account_summary if val.tag == 'NetLiquidation']
-        for value in net_liquidation_values:
-            print(f"Account: {value.account}, NetLiquidation: {value.value} {value.currency}")
-            return value.value
+        """
+        NetLiquidation from the streamed account values
+        """
+        return get_account_store(self.gateway).net_liquidation()
 
     def get_entry_direction(self, signal: BotSeasonalSignal) -> str:
         return "BUY" if signal.signal.direction == "LONG" else "SELL"
@@ -464,18 +629,15 @@ class BotSignalManager:
             multiplier = float(multiplier)
             risk_percent = float(risk_percent)
 
-            self.logger.info("Calculating position size:")
-            self.logger.info(f"Balance: {balance}")
-            self.logger.info(f"Entry price: {entry_price}")
-            self.logger.info(f"Stop loss: {stop_loss}")
-            self.logger.info(f"Multiplier: {multiplier}")
-            self.logger.info(f"Risk percent: {risk_percent}%")
-
             risk_amount = balance * (risk_percent / 100)  # Amount of money to risk
             risk_per_unit = abs(entry_price - stop_loss) * multiplier  # Loss per contract
 
-            self.logger.info(f"Risk amount: {risk_amount}")
-            self.logger.info(f"Risk per contract: {risk_per_unit}")
+            self.logger.debug(
+                "Position size: balance=%s entry=%s stop=%s multiplier=%s risk=%s%% "
+                "risk amount=%s risk per contract=%s",
+                balance, entry_price, stop_loss, multiplier, risk_percent,
+                risk_amount, risk_per_unit,
+            )
 
             if risk_per_unit == 0:
                 self.logger.warning("Risk per contract is 0, returning 1 contract")
@@ -484,12 +646,11 @@ class BotSignalManager:
             quantity = risk_amount / risk_per_unit  # Number of contracts
             result = max(1, int(quantity))  # Minimum 1 contract
 
-            self.logger.info(f"Calculated number of contracts: {result}")
+            self.logger.debug("Calculated number of contracts: %d", result)
             return result
 
         except Exception as e:
-            self.logger.error(f"Error calculating position size: {str(e)}")
-            self.logger.info("Returning minimum position size: 1")
+            self.logger.error("Error calculating position size: %s, using 1 contract", e)
             return 1
 
     def check_and_close_position(self, signal: BotSeasonalSignal, order_id: int, contract: ContFuture) -> bool:
@@ -504,142 +665,96 @@ class BotSignalManager:
         Returns:
             bool: True if position was successfully closed, False otherwise
         """
-        try:
-            self.logger.info("=" * 40)
-            self.logger.info(
-                f"=== Starting position check for {contract.contract.symbol} ==="
-            )
-            
-            # 1. Check for open position
-            self.logger.info("Checking for open position...")
-            positions = self.ib_connector.positions()
-            
-            # Log all positions for debugging
-            self.logger.info(f"Retrieved {len(positions)} positions:")
-            for i, pos in enumerate(positions):
-                self.logger.info(
-                    f"  #{i+1}: symbol={pos.contract.symbol}, "
-                    f"position={pos.position}, "
-                    f"avgCost={pos.avgCost}"
-                )
-            
-            position = next(
-                (p for p in positions if p.contract.symbol == contract.contract.symbol),
-                None
-            )
-            
-            if not position:
-                self.logger.warning(
-                    f"Position for {contract.contract.symbol} not found in positions list."
-                )
-                signal.status = TradeStatus.CLOSE
-                signal.save()
-                return False
-                
-            if position.position == 0:
-                self.logger.info(f"Position for {contract.contract.symbol} has zero volume.")
-                signal.status = TradeStatus.CLOSE
-                signal.save()
-                return False
-                
-            self.logger.info(
-                f"Found position for {contract.contract.symbol}: "
-                f"volume={position.position}, average price={position.avgCost}"
-            )
-            
-            self.ib_connector.reqAllOpenOrders()
-            self.ib_connector.sleep(1) 
-            # 2. Check for active stop orders
-            self.logger.info("Checking for active stop orders...")
-            matching_orders = [
-                trade for trade in self.ib_connector.trades()
-                if trade.order.permId == signal.stop_order_id
-            ]
-            self.logger.info(f"Matching orders: {matching_orders}")
-
-            if not matching_orders:
-                self.logger.info(
-                    f"No active stop order found for {contract.contract.symbol} "
-                    f"with permId {signal.stop_order_id}"
-                )
+        return self.close_positions_batch([(signal, contract)])[0]
+
+    def close_positions_batch(self, exits: list[tuple[BotSeasonalSignal, ContractDetails]],
+                              snapshot: PortfolioSnapshot = None) -> list[bool]:
+        """
+        Closes positions of all exiting signals and marks the signals closed
+
+        Args:
+            exits: (signal, contract details) pairs with due exits
+            snapshot: Portfolio snapshot of this tick (taken if not given)
+
+        Returns:
+            list[bool]: True for every position that was closed by a fill
+        """
+        with request_priority(Priority.EXIT):
+            if snapshot is None:
+                with metrics.close_stage_seconds.time(stage="snapshot"):
+                    snapshot = PortfolioSnapshot.load(self.gateway)
+            results = self.ib_connector.run(self._close_positions_async(exits, snapshot))
+        with metrics.close_stage_seconds.time(stage="save"):
+            for signal, _ in exits:
                 signal.status = TradeStatus.CLOSE
-                signal.save()
-                return False
-            
-            stop_order = matching_orders[0].order
-            self.logger.info(
-                f"Found stop order: permId={stop_order.permId}, "
-                f"quantity={stop_order.totalQuantity}"
-            )
-            
-            # 3. Close position with size equal to stop order
-            self.logger.info(
-                f"Preparing to close position for {contract.contract.symbol}"
-            )
-            action = 'SELL' if position.position > 0 else 'BUY'
-            quantity = stop_order.totalQuantity  # Use stop order quantity
-            
-            self.logger.info(
-                f"Creating order: {action} {quantity} {contract.contract.symbol}"
-            )
-            
-            close_order = MarketOrder(action, quantity)
-            close_order.orderId = self.ib_connector.client.getReqId()
-            self.logger.info(f"Assigned new order ID: {close_order.orderId}")
-            
-            trade = self.ib_connector.placeOrder(contract.contract, close_order)
-            
-            if not trade:
-                self.logger.error(
-                    f"Failed to place closing order for {contract.contract.symbol}."
-                )
-                return False
-                
-            self.logger.info(
-                f"Closing order placed: orderId={trade.order.orderId}, "
-                f"status={trade.orderStatus.status}, "
-                f"{action} {quantity} {contract.contract.symbol}"
-            )
+            self._save_signals([signal for signal, _ in exits], STATUS_FIELDS)
+            for signal, _ in exits:
+                self.logger.info("Signal %s closed", signal.pk)
+        return results
 
-            # Cancel stop order after placing market order
-            self.logger.info(f"Cancelling stop order with permId: {stop_order.permId}")
-            self.ib_connector.cancelOrder(stop_order)
-            self.logger.info("Stop order cancellation request sent")
-            
-            # 4. Check closing status
-            wait_time = 5
-            self.logger.info(f"Waiting for closing order execution ({wait_time} sec)...")
-            self.ib_connector.sleep(wait_time)
-            
-            # Check if position was closed
-            positions = self.ib_connector.positions()
-            position = next(
-                (p for p in positions if p.contract.symbol == contract.contract.symbol),
-                None
+    async def _close_positions_async(self, exits: list[tuple[BotSeasonalSignal, ContractDetails]],
+                                     snapshot: PortfolioSnapshot) -> list[bool]:
+        """
+        Sends closing market orders for all exits, cancels their stops and
+        waits for the fills together. Does not touch the database.
+
+        Args:
+            exits: (signal, contract details) pairs with due exits
+            snapshot: Portfolio snapshot of this tick
+
+        Returns:
+            list[bool]: True for every position that was closed by a fill
+        """
+        results = [False] * len(exits)
+        closing = []
+        for index, (signal, details) in enumerate(exits):
+            contract = details.contract
+            with log_context(signal=signal.pk, symbol=contract.symbol):
+                try:
+                    position = snapshot.position_for(contract)
+                    if not position:
+                        self.logger.warning("Position not found in positions list")
+                        continue
+
+                    stop_trade = snapshot.stop_trade_for(signal.stop_order_id, signal.order_id)
+                    if not stop_trade:
+                        self.logger.info("No active stop order found with permId %s", signal.stop_order_id)
+                        continue
+
+                    # Close position with size equal to stop order
+                    stop_order = stop_trade.order
+                    action = 'SELL' if position.position > 0 else 'BUY'
+                    close_order = MarketOrder(action, stop_order.totalQuantity)
+                    close_order.orderId = self.ib_connector.client.getReqId()
+                    with metrics.close_stage_seconds.time(stage="placement"):
+                        trade = await self.gateway.placeOrderAsync(contract, close_order)
+                    self.logger.info(
+                        "Closing order placed: orderId=%s, %s %s",
+                        trade.order.orderId, action, stop_order.totalQuantity,
+                    )
+
+                    # Cancel stop order after placing market order
+                    with metrics.close_stage_seconds.time(stage="stop_cancel"), request_priority(Priority.STOP):
+                        await self.gateway.cancelOrderAsync(stop_order)
+                    self.logger.debug("Cancelling stop order with permId: %s", stop_order.permId)
+                    closing.append((index, trade))
+                except Exception as e:
+                    metrics.close_results.inc(result="error")
+                    self.logger.error("Error closing position: %s", e, exc_info=True)
+
+        with metrics.close_stage_seconds.time(stage="fill"):
+            fills = await asyncio.gather(
+                *(wait_for_fill(trade, CLOSE_FILL_TIMEOUT) for _, trade in closing)
             )
-            
-            if not position or position.position == 0:
-                self.logger.info(
-                    f"Position for {contract.contract.symbol} successfully closed"
-                )
-                signal.status = TradeStatus.CLOSE
-                signal.save()
-                return True
+        for (index, trade), filled in zip(closing, fills):
+            results[index] = filled
+            metrics.close_results.inc(result="filled" if filled else "unfilled")
+            symbol = trade.contract.symbol
+            if filled:
+                self.logger.info("Position for %s successfully closed", symbol)
             else:
                 self.logger.warning(
-                    f"Failed to fully close position for {contract.contract.symbol}, "
-                    f"remaining volume: {position.position}"
+                    "Failed to fully close position for %s, order status: %s, remaining: %s",
+                    symbol, trade.orderStatus.status, trade.orderStatus.remaining,
                 )
-                return False
-                
-        except Exception as e:
-            self.logger.error(
-                f"Error closing position {contract.contract.symbol}: {str(e)}",
-                exc_info=True
-            )
-            return False
-        finally:
-            self.logger.info(
-                f"=== Finished position check for {contract.contract.symbol} ==="
-            )
-            self.logger.info("=" * 40)
+        return results
@@ -0,0 +1,81 @@
+"""
+Cache of the bot run flag shared between the web app and bot processes
+"""
+
+import json
+import logging
+import time
+
+from django.conf import settings
+
+from trading_bot.redis_client import get_redis, report_failure
+
+logger = logging.getLogger('trading_bot')
+
+
+class BotStateCache:
+    """
+    Two-tier cache of BotState as {'is_running', 'last_updated'}.
+
+    The first tier lives in process for local_ttl seconds, the second one
+    in Redis. BotState.save() writes through both tiers, so a toggle reaches
+    the bot processes within local_ttl seconds, less than one tick.
+    """
+
+    def __init__(self, local_ttl: float = None, shared_ttl: float = None):
+        """
+        Args:
+            local_ttl: Lifetime of the in-process copy, seconds
+            shared_ttl: Lifetime of the Redis copy, seconds; bounds staleness
+                if a write-through failed
+        """
+        self.local_ttl = settings.BOT_STATE_CACHE_TTL if local_ttl is None else local_ttl
+        self.shared_ttl = shared_ttl or settings.BOT_STATE_CACHE_SHARED_TTL
+        self._state = None
+        self._expires_at = 0.0
+
+    def get(self) -> dict | None:
+        """
+        Returns:
+            dict | None: Cached state, None if neither tier has it
+        """
+        if self._state is not None and time.monotonic() < self._expires_at:
+            return self._state
+        try:
+            raw = get_redis().get(settings.BOT_STATE_CACHE_KEY)
+        except Exception as e:
+            report_failure(e)
+            logger.debug("Failed to read cached bot state: %s", e)
+            return None
+        if raw is None:
+            return None
+        self._store_local(json.loads(raw))
+        return self._state
+
+    def put(self, is_running: bool, last_updated) -> dict:
+        """
+        Write a freshly saved or loaded state through both tiers
+
+        Returns:
+            dict: The cached state
+        """
+        state = {'is_running': is_running, 'last_updated': last_updated.isoformat()}
+        self._store_local(state)
+        try:
+            get_redis().set(settings.BOT_STATE_CACHE_KEY, json.dumps(state), ex=int(self.shared_ttl))
+        except Exception as e:
+            report_failure(e)
+            logger.debug("Failed to cache bot state: %s", e)
+        return state
+
+    def clear(self) -> None:
+        self._state = None
+        self._expires_at = 0.0
+
+    def _store_local(self, state: dict) -> None:
+        self._state = state
+        self._expires_at = time.monotonic() + self.local_ttl
+
+
+# Create global bot state cache instance
+bot_state_cache = BotStateCache()
@@ -0,0 +1,97 @@
+"""
+Single-flight coalescing of identical gateway requests
+"""
+
+import asyncio
+import logging
+
+from ib_insync import IB
+
+from trading_bot import metrics
+from trading_bot.request_scheduler import get_paced_gateway
+
+logger = logging.getLogger('trading_bot.core.bot_signal_manager')
+
+# Requests whose identical calls are shared, with their sync counterparts
+COALESCED = {
+    'reqContractDetailsAsync': 'reqContractDetails',
+    'reqHistoricalDataAsync': 'reqHistoricalData',
+}
+
+
+class RequestCoalescer:
+    """
+    Proxy in front of an IB instance.
+
+    Identical contract details and historical data requests share one
+    in-flight future, and their non-empty results are memoized until the
+    next tick, so gateway traffic grows with distinct contracts rather than
+    with the number of signals. Everything else is delegated to the wrapped
+    IB instance.
+    """
+
+    def __init__(self, ib_connector: IB):
+        """
+        Args:
+            ib_connector: IB instance to wrap
+        """
+        self.ib = ib_connector
+        self._in_flight: dict[tuple, asyncio.Future] = {}
+        self._memo: dict[tuple, object] = {}
+
+    def __getattr__(self, name: str):
+        return getattr(self.ib, name)
+
+    def new_tick(self) -> None:
+        """
+        Forget the results memoized during the previous tick
+        """
+        self._memo.clear()
+
+    async def reqContractDetailsAsync(self, contract, **kwargs):
+        return await self._coalesce('reqContractDetailsAsync', contract, kwargs)
+
+    async def reqHistoricalDataAsync(self, contract, **kwargs):
+        return await self._coalesce('reqHistoricalDataAsync', contract, kwargs)
+
+    def reqContractDetails(self, contract, **kwargs):
+        return self.ib.run(self.reqContractDetailsAsync(contract, **kwargs))
+
+    def reqHistoricalData(self, contract, **kwargs):
+        return self.ib.run(self.reqHistoricalDataAsync(contract, **kwargs))
+
+    async def _coalesce(self, method: str, contract, kwargs: dict):
+        key = (method, repr(contract), tuple(sorted(kwargs.items())))
+        if key in self._memo:
+            metrics.gateway_requests.inc(method=COALESCED[method], outcome='memoized')
+            return self._memo[key]
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            metrics.gateway_requests.inc(method=COALESCED[method], outcome='coalesced')
+            logger.debug("Joining in-flight %s for %s", COALESCED[method], contract.symbol)
+        else:
+            metrics.gateway_requests.inc(method=COALESCED[method], outcome='sent')
+            future = asyncio.ensure_future(getattr(self.ib, method)(contract, **kwargs))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        # A waiter that times out must not cancel the request for the others
+        return await asyncio.shield(future)
+
+    def _finish(self, key: tuple, future: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if not future.cancelled() and future.exception() is None and future.result():
+            self._memo[key] = future.result()
+
+
+def get_request_coalescer(ib_connector: IB) -> RequestCoalescer:
+    """
+    Returns the coalescer of the given IB instance, creating it once so that
+    signal managers of one session share in-flight requests. Requests that
+    are actually sent go through the paced gateway of the session. Stored on
+    the instance, like the paced gateway, so it is freed with the session.
+    """
+    coalescer = vars(ib_connector).get('_request_coalescer')
+    if coalescer is None:
+        coalescer = ib_connector._request_coalescer = RequestCoalescer(get_paced_gateway(ib_connector))
+    return coalescer
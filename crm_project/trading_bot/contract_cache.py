@@ -0,0 +1,205 @@
+"""
+Cache of resolved front-month contracts shared between bot ticks
+"""
+
+import dataclasses
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Callable
+
+from django.conf import settings
+from ib_insync import ComboLeg, Contract, ContractDetails, DeltaNeutralContract, TagValue
+
+from trading_bot.redis_client import get_redis, report_failure
+
+logger = logging.getLogger('trading_bot.core.bot_signal_manager')
+
+REDIS_KEY_PREFIX = 'trading_bot:contract'
+
+CacheKey = tuple[str, str]
+
+
+def _dump_details(details: ContractDetails, expires_at: float) -> str:
+    """
+    JSON form of a cache entry for the shared tier
+    """
+    return json.dumps({'expires_at': expires_at, 'details': dataclasses.asdict(details)})
+
+
+def _load_details(payload: str | bytes) -> tuple[float, ContractDetails]:
+    """
+    Rebuild a cache entry from _dump_details output
+
+    Returns:
+        tuple: (expires_at, details)
+
+    Raises:
+        ValueError, TypeError, KeyError: If the payload is not valid
+    """
+    entry = json.loads(payload)
+    fields = entry['details']
+    contract = fields.pop('contract')
+    if contract is not None:
+        contract['comboLegs'] = [ComboLeg(**leg) for leg in contract.get('comboLegs') or []]
+        neutral = contract.get('deltaNeutralContract')
+        contract['deltaNeutralContract'] = DeltaNeutralContract(**neutral) if neutral else None
+        contract = Contract.create(**contract)
+    fields['secIdList'] = [TagValue(*tag) for tag in fields.get('secIdList') or []]
+    return entry['expires_at'], ContractDetails(contract=contract, **fields)
+
+
+class ContractCache:
+    """
+    Two-tier cache of ContractDetails keyed by (financial_instrument, exchange).
+
+    The first tier is an in-process LRU, the second one is Redis so that
+    other workers and a restarted daemon do not have to ask the gateway
+    again. An entry never outlives the last trade date of its contract, and
+    a change of the resolved conId (roll) invalidates everything that was
+    derived from the old contract through roll listeners.
+    """
+
+    def __init__(self, ttl: float = None, max_entries: int = None):
+        """
+        Args:
+            ttl: Entry lifetime in seconds
+            max_entries: Maximum number of entries kept in process
+        """
+        self.ttl = ttl or settings.BOT_CONTRACT_CACHE_TTL
+        self.max_entries = max_entries or settings.BOT_CONTRACT_CACHE_MAX_ENTRIES
+        self._entries: OrderedDict[CacheKey, tuple[float, ContractDetails]] = OrderedDict()
+        self._con_ids: dict[CacheKey, int] = {}
+        self._roll_listeners: list[Callable[[CacheKey, int, int], None]] = []
+
+    def add_roll_listener(self, listener: Callable[[CacheKey, int, int], None]) -> None:
+        """
+        Register a callback called as listener(key, old_con_id, new_con_id)
+        """
+        self._roll_listeners.append(listener)
+
+    def get(self, key: CacheKey) -> ContractDetails | None:
+        """
+        Returns cached contract details or None if missing or expired
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, details = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                return details
+            del self._entries[key]
+
+        shared = self._get_shared(key)
+        if shared is None:
+            return None
+        # Keep the expiry of the shared entry, so both tiers drop it together
+        expires_at, details = shared
+        if expires_at <= now:
+            return None
+        self._store_local(key, details, expires_at)
+        return details
+
+    def put(self, key: CacheKey, details: ContractDetails) -> None:
+        """
+        Store freshly resolved contract details
+
+        Args:
+            key: (financial_instrument, exchange)
+            details: Details returned by the gateway
+        """
+        expires_at = self._expires_at(details, time.time())
+        self._store_local(key, details, expires_at)
+        self._put_shared(key, details, expires_at)
+
+    def invalidate(self, key: CacheKey) -> None:
+        """
+        Drop the entry from both tiers
+        """
+        self._entries.pop(key, None)
+        try:
+            get_redis().delete(self._redis_key(key))
+        except Exception as e:
+            report_failure(e)
+            logger.debug(f"Failed to invalidate shared contract cache: {str(e)}")
+
+    def clear(self) -> None:
+        """
+        Drop all in-process entries
+        """
+        self._entries.clear()
+        self._con_ids.clear()
+
+    def _store_local(self, key: CacheKey, details: ContractDetails, expires_at: float) -> None:
+        self._check_roll(key, details.contract.conId)
+        self._entries[key] = (expires_at, details)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _check_roll(self, key: CacheKey, con_id: int) -> None:
+        """
+        Remember the resolved conId and notify listeners when it changes
+        """
+        old_con_id = self._con_ids.get(key)
+        self._con_ids[key] = con_id
+        if not old_con_id or old_con_id == con_id:
+            return
+
+        logger.info(
+            f"Contract roll detected for {key}: conId {old_con_id} -> {con_id}"
+        )
+        for listener in self._roll_listeners:
+            try:
+                listener(key, old_con_id, con_id)
+            except Exception as e:
+                logger.error(f"Error in contract roll listener: {str(e)}")
+
+    def _expires_at(self, details: ContractDetails, now: float) -> float:
+        """
+        Entry expiry: TTL, but never later than the end of the contract's last
+        trade date. The cap is the following midnight UTC, after the sessions
+        of that date have ended, so the contract stays cached on its expiry
+        day; the roll to the next contract is picked up by _check_roll.
+        """
+        expires_at = now + self.ttl
+        last_trade = details.contract.lastTradeDateOrContractMonth
+        if last_trade and len(last_trade) >= 8:
+            try:
+                last_trade_end = datetime.strptime(last_trade[:8], '%Y%m%d').replace(
+                    tzinfo=dt_timezone.utc
+                ) + timedelta(days=1)
+                expires_at = min(expires_at, last_trade_end.timestamp())
+            except ValueError:
+                pass
+        return expires_at
+
+    def _get_shared(self, key: CacheKey) -> tuple[float, ContractDetails] | None:
+        try:
+            payload = get_redis().get(self._redis_key(key))
+            return _load_details(payload) if payload else None
+        except Exception as e:
+            report_failure(e)
+            logger.debug(f"Failed to read shared contract cache: {str(e)}")
+            return None
+
+    def _put_shared(self, key: CacheKey, details: ContractDetails, expires_at: float) -> None:
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
+        try:
+            get_redis().set(self._redis_key(key), _dump_details(details, expires_at), ex=ttl)
+        except Exception as e:
+            report_failure(e)
+            logger.debug(f"Failed to write shared contract cache: {str(e)}")
+
+    @staticmethod
+    def _redis_key(key: CacheKey) -> str:
+        return f"{REDIS_KEY_PREFIX}:{key[0]}:{key[1]}"
+
+
+# Create global cache instance
+contract_cache = ContractCache()
@@ -0,0 +1,246 @@
+"""
+Resident trading bot: keeps one IB Gateway session open between ticks
+"""
+
+import logging
+import random
+import signal
+import time
+
+from django.conf import settings
+
+from trading_bot import metrics
+from trading_bot.bot import TradingBot, create_signal_manager
+from trading_bot.models import BotState
+from trading_bot.redis_client import get_redis, report_failure
+from trading_bot.scheduler import DeadlineScheduler
+from trading_bot.tick_lock import tick_lease
+
+logger = logging.getLogger("bot")
+
+# How often the daemon checks Redis for a wake-up request, seconds
+WAKE_POLL_INTERVAL = 0.5
+# Heartbeat lifetime; the daemon is considered dead when it expires
+HEARTBEAT_TTL = 60
+
+
+class BotDaemon(TradingBot):
+    """
+    Long-running bot that owns a single IB session.
+
+    The signal loop runs on the ib_insync event loop. A reconnect supervisor
+    restores the session with exponential backoff, always using the same
+    client id so that the gateway sees one stable API client. Ticks run at
+    the exact entry/exit instants taken from the deadline scheduler; the
+    tick interval is only a safety sweep.
+    """
+
+    def __init__(
+        self,
+        host: str = None,
+        port: int = None,
+        client_id: int = None,
+        tick_interval: float = None,
+    ):
+        """
+        Args:
+            host: IB Gateway host
+            port: IB Gateway port
+            client_id: Stable client ID (settings.IB_CLIENT_ID by default)
+            tick_interval: Safety sweep period in seconds
+        """
+        super().__init__(
+            host=host,
+            port=port,
+            client_id=client_id or settings.IB_CLIENT_ID,
+        )
+        self.tick_interval = tick_interval or settings.BOT_DAEMON_TICK_INTERVAL
+        self.min_backoff = settings.BOT_DAEMON_RECONNECT_MIN_DELAY
+        self.max_backoff = settings.BOT_DAEMON_RECONNECT_MAX_DELAY
+        self._reconnect_attempt = 0
+        self._stop_requested = False
+        self._heartbeat_at = 0.0
+        self.scheduler = DeadlineScheduler(clock=self._gateway_time)
+        self.ib.disconnectedEvent += self._on_disconnected
+
+    def _gateway_time(self) -> float:
+        """
+        Current epoch by the gateway clock the tick decides what is due by;
+        the local clock while there is no session
+        """
+        if self.signal_manager is None:
+            return time.time()
+        return self.signal_manager.clock.timestamp()
+
+    def _on_disconnected(self) -> None:
+        """
+        Called by ib_insync when the gateway drops the session
+        """
+        if self.connected:
+            logger.warning("Lost connection to IB Gateway")
+        self.connected = False
+        self.signal_manager = None
+
+    def stop(self, *args) -> None:
+        """
+        Request a graceful shutdown after the current tick
+        """
+        logger.info("Stop requested for bot daemon")
+        self._stop_requested = True
+
+    def install_signal_handlers(self) -> None:
+        """
+        Stop the daemon on SIGTERM/SIGINT
+        """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def run_forever(self) -> None:
+        """
+        Main daemon loop: supervise the connection and run ticks
+        """
+        logger.info(
+            f"Starting bot daemon (client id {self.client_id}, "
+            f"tick interval {self.tick_interval}s)"
+        )
+        if settings.BOT_METRICS_PORT:
+            metrics.start_http_server(settings.BOT_METRICS_PORT)
+        try:
+            while not self._stop_requested:
+                if not self.ib.isConnected():
+                    self._reconnect()
+                    continue
+
+                self._heartbeat()
+                self._tick()
+                self._schedule_next()
+        finally:
+            self.disconnect()
+            logger.info("Bot daemon stopped")
+
+    def _reconnect(self) -> None:
+        """
+        Connect to the gateway, backing off exponentially between failures
+        """
+        self.connected = False
+        if self.connect():
+            self._reconnect_attempt = 0
+            self.signal_manager = create_signal_manager(self.ib)
+            return
+
+        delay = min(
+            self.max_backoff, self.min_backoff * 2 ** self._reconnect_attempt
+        )
+        # Jitter keeps several restarted daemons from hitting the gateway together
+        delay *= random.uniform(0.5, 1.0)
+        self._reconnect_attempt += 1
+        logger.warning(
+            f"Reconnect attempt {self._reconnect_attempt} failed, "
+            f"next attempt in {delay:.1f}s"
+        )
+        self._wait_for_wakeup(delay)
+
+    def _tick(self) -> None:
+        """
+        Run one pass of the signal loop on the open session
+        """
+        try:
+            if not BotState.cached_state()['is_running']:
+                return
+            if self.signal_manager is None:
+                self.signal_manager = create_signal_manager(self.ib)
+            # Guards against a second daemon or a one-shot run on the same account
+            with tick_lease() as lease:
+                if lease is not None:
+                    self.signal_manager.manage_signals()
+        except Exception as e:
+            logger.error(f"Error in bot daemon tick: {str(e)}", exc_info=True)
+        finally:
+            metrics.registry.publish()
+
+    def _schedule_next(self) -> None:
+        """
+        Sleep until the next signal deadline or the safety sweep, whichever
+        comes first
+        """
+        try:
+            self.scheduler.rebuild_if_needed()
+            # Drop events covered by the tick that just ran, including
+            # changes made by the tick itself
+            self.scheduler.pop_due(self._gateway_time())
+            self.scheduler.apply_changes()
+            if self.signal_manager is not None:
+                # Entries postponed or failed in the tick come back before the sweep
+                retries, self.signal_manager.retries = self.signal_manager.retries, {}
+                for signal_id, moment in retries.items():
+                    self.scheduler.schedule_retry(signal_id, moment.timestamp())
+        except Exception as e:
+            logger.error(f"Failed to update deadline scheduler: {str(e)}", exc_info=True)
+        self._wait_for_wakeup(self.tick_interval, watch_deadlines=True)
+
+    def _wait_for_wakeup(self, timeout: float, watch_deadlines: bool = False) -> None:
+        """
+        Keep the IB event loop running until timeout or a wake-up request
+
+        Args:
+            timeout: Maximum time to wait in seconds
+            watch_deadlines: Also wake up at the next scheduled signal event
+                or when a changed signal is already due
+        """
+        deadline = time.monotonic() + timeout
+        while not self._stop_requested:
+            remaining = deadline - time.monotonic()
+            if watch_deadlines:
+                next_event = self.scheduler.next_deadline()
+                if next_event is not None:
+                    remaining = min(remaining, next_event - self._gateway_time())
+            if remaining <= 0:
+                return
+            self.ib.sleep(min(WAKE_POLL_INTERVAL, remaining))
+            if self._consume_wakeup():
+                return
+            if time.monotonic() - self._heartbeat_at >= HEARTBEAT_TTL / 3:
+                self._heartbeat()
+            if watch_deadlines and self._apply_changes():
+                return
+
+    def _apply_changes(self) -> bool:
+        try:
+            return self.scheduler.apply_changes()
+        except Exception as e:
+            logger.error(f"Failed to apply signal changes: {str(e)}", exc_info=True)
+            return False
+
+    def _consume_wakeup(self) -> bool:
+        """
+        Returns:
+            bool: True if somebody asked the daemon to run a tick now
+        """
+        try:
+            return bool(get_redis().delete(settings.BOT_DAEMON_WAKE_KEY))
+        except Exception as e:
+            report_failure(e)
+            logger.debug(f"Failed to read wake-up key: {str(e)}")
+            return False
+
+    def _heartbeat(self) -> None:
+        self._heartbeat_at = time.monotonic()
+        try:
+            get_redis().set(
+                settings.BOT_DAEMON_HEARTBEAT_KEY, time.time(), ex=HEARTBEAT_TTL
+            )
+        except Exception as e:
+            report_failure(e)
+            logger.debug(f"Failed to write daemon heartbeat: {str(e)}")
+
+
+def wake_daemon() -> bool:
+    """
+    Ask the resident bot to run a tick as soon as possible
+
+    Returns:
+        bool: True if a live daemon heartbeat was found
+    """
+    client = get_redis()
+    client.set(settings.BOT_DAEMON_WAKE_KEY, time.time())
+    return bool(client.exists(settings.BOT_DAEMON_HEARTBEAT_KEY))
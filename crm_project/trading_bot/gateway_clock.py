@@ -0,0 +1,185 @@
+"""
+Gateway clock estimated from periodic reqCurrentTime samples
+"""
+
+import collections
+import logging
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from ib_insync import IB
+
+logger = logging.getLogger('trading_bot.core.bot_signal_manager')
+
+# reqCurrentTime has one second resolution: the gateway time is somewhere
+# inside [t, t + 1), so samples are centred on the middle of that second
+RESOLUTION = 1.0
+# Minimal time span covered by samples before drift is estimated, seconds
+MIN_DRIFT_SPAN = 600
+
+local_tz = ZoneInfo(settings.TIME_ZONE)
+
+
+class GatewayClock:
+    """
+    Serves the current gateway time without a round-trip.
+
+    The gateway is asked for its time every sample_interval seconds. Each
+    sample gives an offset between the gateway clock and the local monotonic
+    clock; a least-squares line over the last samples gives the offset and
+    its drift, so now() is a monotonic read plus arithmetic. On a paced
+    gateway samples take a token at top priority and their round-trip
+    starts when they leave the queue.
+    """
+
+    def __init__(self, ib_connector: IB, sample_interval: float = None,
+                 window: int = None, max_skew: float = None):
+        """
+        Args:
+            ib_connector: IB instance to sample
+            sample_interval: Seconds between samples
+            window: Number of samples used for the estimate
+            max_skew: Gateway/local clock difference that is logged as a warning, seconds
+        """
+        self.ib_connector = ib_connector
+        self.sample_interval = sample_interval or settings.BOT_CLOCK_SAMPLE_INTERVAL
+        self.max_skew = settings.BOT_CLOCK_MAX_SKEW if max_skew is None else max_skew
+        # (monotonic at the middle of the request, offset, round-trip time)
+        self._samples = collections.deque(maxlen=window or settings.BOT_CLOCK_WINDOW)
+        self._intercept = None
+        self._drift = 0.0
+        self._reference = 0.0
+        self._sampled_at = None
+
+    @property
+    def calibrated(self) -> bool:
+        return self._intercept is not None
+
+    def refresh_if_stale(self) -> None:
+        """
+        Take a sample if the last one is older than the sample interval
+        """
+        if self._is_stale():
+            started, gateway_time = self.ib_connector.run(self._request_async())
+            self._add_sample(started, time.monotonic(), gateway_time)
+
+    async def refresh_if_stale_async(self) -> None:
+        """
+        Asynchronous counterpart of refresh_if_stale
+        """
+        if self._is_stale():
+            started, gateway_time = await self._request_async()
+            self._add_sample(started, time.monotonic(), gateway_time)
+
+    def timestamp(self) -> float:
+        """
+        Returns:
+            float: Current gateway time as epoch seconds, local clock if not calibrated
+        """
+        if self._intercept is None:
+            return time.time()
+        mono = time.monotonic()
+        return mono + self._intercept + self._drift * (mono - self._reference)
+
+    def now(self) -> datetime:
+        """
+        Returns:
+            datetime: Current gateway time in the project time zone
+        """
+        return datetime.fromtimestamp(self.timestamp(), tz=local_tz)
+
+    @property
+    def offset(self) -> float | None:
+        """
+        Gateway clock minus local wall clock, seconds
+        """
+        if self._intercept is None:
+            return None
+        return self.timestamp() - time.time()
+
+    @property
+    def rtt(self) -> float | None:
+        """
+        Round-trip time of the latest sample, seconds
+        """
+        return self._samples[-1][2] if self._samples else None
+
+    @property
+    def drift(self) -> float:
+        """
+        Gateway clock rate relative to the local monotonic clock, ppm
+        """
+        return self._drift * 1e6
+
+    def stats(self) -> dict:
+        return {
+            'offset': self.offset,
+            'rtt': self.rtt,
+            'drift_ppm': self.drift,
+            'samples': len(self._samples),
+        }
+
+    async def _request_async(self) -> tuple[float, datetime]:
+        """
+        Returns:
+            tuple: (monotonic time the request was sent, gateway time)
+        """
+        request = getattr(self.ib_connector, 'reqCurrentTimeSampleAsync', None)
+        if request is not None:
+            return await request()
+        started = time.monotonic()
+        return started, await self.ib_connector.reqCurrentTimeAsync()
+
+    def _is_stale(self) -> bool:
+        return (
+            self._sampled_at is None
+            or time.monotonic() - self._sampled_at >= self.sample_interval
+        )
+
+    def _add_sample(self, started: float, finished: float, gateway_time: datetime) -> None:
+        middle = (started + finished) / 2
+        rtt = finished - started
+        offset = gateway_time.timestamp() + RESOLUTION / 2 - middle
+        self._samples.append((middle, offset, rtt))
+        self._sampled_at = finished
+        self._fit()
+
+        skew = self.offset
+        logger.info(
+            f"Gateway clock sample: offset {skew:+.3f}s, rtt {rtt * 1000:.0f} ms, "
+            f"drift {self.drift:+.1f} ppm"
+        )
+        if abs(skew) > self.max_skew:
+            logger.warning(f"Gateway clock differs from local clock by {skew:+.3f}s")
+
+    def _fit(self) -> None:
+        """
+        Least-squares line offset = intercept + drift * (monotonic - reference)
+        """
+        points = [(middle, offset) for middle, offset, _ in self._samples]
+        self._reference = points[-1][0]
+        mean_x = sum(x - self._reference for x, _ in points) / len(points)
+        mean_y = sum(y for _, y in points) / len(points)
+        span = points[-1][0] - points[0][0]
+        if len(points) < 3 or span < MIN_DRIFT_SPAN:
+            self._drift = 0.0
+        else:
+            var_x = sum((x - self._reference - mean_x) ** 2 for x, _ in points)
+            cov = sum((x - self._reference - mean_x) * (y - mean_y) for x, y in points)
+            self._drift = cov / var_x
+        self._intercept = mean_y - self._drift * mean_x
+
+
+def get_gateway_clock(ib_connector: IB) -> GatewayClock:
+    """
+    Returns the clock of the given IB instance, creating it once so that
+    samples survive re-created signal managers (stored on the instance and
+    freed with it)
+    """
+    clock = vars(ib_connector).get('_gateway_clock')
+    if clock is None:
+        clock = ib_connector._gateway_clock = GatewayClock(ib_connector)
+    return clock
+
@@ -0,0 +1,214 @@
+"""
+Команда для замера конкуренции писателей за базу данных
+"""
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.utils import timezone
+
+from signals.models import SeasonalSignal, Symbol
+from trading_bot import redis_client
+from trading_bot.bot_signal_manager import BotSignalManager, STATUS_FIELDS
+from trading_bot.models import BotSeasonalSignal, BotState, TradeStatus
+from trading_bot.signal_manager import SignalManager
+
+BATCH_SIZE = 1000
+# Rows written by one bot batch
+BOT_BATCH = 20
+
+
+def _web(rng: random.Random) -> None:
+    """
+    Web process: the bot toggle and a signal edit through the API, each
+    in its own transaction
+    """
+    state = BotState.get_state()
+    state.is_running = not state.is_running
+    state.save()
+    signal = SeasonalSignal.objects.order_by('?').first()
+    signal.entry_day = rng.randint(1, 28)
+    signal.save()
+
+
+def _bot(rng: random.Random) -> None:
+    """
+    celery-bot: reads actionable signals and writes one batch of rows
+    """
+    list(BotSignalManager.get_actionable_signals(timezone.now())[:BOT_BATCH])
+    rows = list(BotSeasonalSignal.objects.order_by('?')[:BOT_BATCH])
+    for row in rows:
+        row.status = rng.choice([TradeStatus.AWAITING, TradeStatus.OPEN])
+    BotSignalManager._save_signals(rows, STATUS_FIELDS)
+
+
+def _signals(rng: random.Random) -> None:
+    """
+    celery-signals: full signal sync
+    """
+    SignalManager().check_signals(full=True)
+
+
+WRITERS = {'web': _web, 'celery-bot': _bot, 'celery-signals': _signals}
+
+
+def _run_writer(name: str, duration: float, pause: float, seed: int, options: dict,
+                results: multiprocessing.Queue) -> None:
+    # Connections must not be shared with the parent process
+    connections.close_all()
+    connection.settings_dict['OPTIONS'] = options
+    logging.disable(logging.WARNING)
+    rng = random.Random(seed)
+    operation = WRITERS[name]
+    latencies, locked, errors = [], 0, 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            operation(rng)
+            latencies.append(time.perf_counter() - started)
+        except OperationalError as e:
+            if 'locked' in str(e):
+                locked += 1
+            else:
+                errors += 1
+        time.sleep(pause)
+    connections.close_all()
+    results.put({
+        'writer': name,
+        'operations': len(latencies),
+        'locked_errors': locked,
+        'other_errors': errors,
+        'p50': round(statistics.median(latencies), 4) if latencies else None,
+        'p95': round(statistics.quantiles(latencies, n=20)[-1], 4) if len(latencies) > 1 else None,
+        'max': round(max(latencies), 4) if latencies else None,
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает одновременно три писателя (веб, celery-bot, celery-signals) на '
+        'тестовой базе и замеряет задержки и ошибки "database is locked". '
+        'С --legacy SQLite работает без WAL и IMMEDIATE-транзакций, как раньше. '
+        'Результат выводится в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=20,
+                            help='Длительность замера, сек')
+        parser.add_argument('--signals', type=int, default=2000,
+                            help='Количество SeasonalSignal')
+        parser.add_argument('--pause', type=float, default=0.01,
+                            help='Пауза между операциями писателя, сек')
+        parser.add_argument('--legacy', action='store_true',
+                            help='Настройки SQLite по умолчанию (журнал DELETE, таймаут 5 сек)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default=None, help='Файл для JSON результата')
+
+    def handle(self, *args, **options):
+        redis_client.disable()
+        logging.disable(logging.WARNING)
+
+        db_options = dict(connection.settings_dict.get('OPTIONS', {}))
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        directory = None
+        if connection.vendor == 'sqlite':
+            # The writers are separate processes: in-memory test databases are not shared
+            directory = tempfile.mkdtemp()
+            test_settings['NAME'] = os.path.join(directory, 'bench_contention.sqlite3')
+            if options['legacy']:
+                db_options = {}
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self._seed(options['signals'], random.Random(options['seed']))
+            journal_mode = None
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute(f"PRAGMA journal_mode={'DELETE' if options['legacy'] else 'WAL'}")
+                    journal_mode = cursor.fetchone()[0]
+            connections.close_all()
+            results = self._run_writers(options, db_options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if directory:
+                shutil.rmtree(directory, ignore_errors=True)
+            logging.disable(logging.NOTSET)
+
+        report = json.dumps({
+            'database': connection.vendor,
+            'journal_mode': journal_mode,
+            'options': {key: value for key, value in db_options.items() if key != 'pool'},
+            'duration': options['duration'],
+            'signals': options['signals'],
+            'results': results,
+        }, indent=2, default=str)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+        self.stdout.write(report)
+
+    @staticmethod
+    def _run_writers(options, db_options: dict) -> list[dict]:
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_run_writer,
+                args=(name, options['duration'], options['pause'], options['seed'] + index,
+                      db_options, results),
+            )
+            for index, name in enumerate(WRITERS)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        return sorted(collected, key=lambda result: result['writer'])
+
+    @staticmethod
+    def _seed(size: int, rng: random.Random) -> None:
+        symbols = [
+            Symbol(financial_instrument=f'S{index:04d}', company_name=f'Symbol {index}', exchange='CME')
+            for index in range(50)
+        ]
+        Symbol.objects.bulk_create(symbols)
+        symbols = list(Symbol.objects.all())
+        SeasonalSignal.objects.bulk_create([
+            SeasonalSignal(
+                magic_number=index + 1,
+                symbol=rng.choice(symbols),
+                stoploss=10,
+                risk=1,
+                entry_month=rng.randint(1, 12),
+                entry_day=rng.randint(1, 28),
+                takeprofit_month=rng.randint(1, 12),
+                takeprofit_day=rng.randint(1, 28),
+                open_time=dt_time(10),
+                close_time=dt_time(16),
+            )
+            for index in range(size)
+        ], batch_size=BATCH_SIZE)
+        now = timezone.now()
+        with transaction.atomic():
+            BotSeasonalSignal.objects.bulk_create([
+                BotSeasonalSignal(
+                    signal_id=signal_id,
+                    entry_date=now + timedelta(days=rng.randint(-30, 300)),
+                    exit_date=now + timedelta(days=rng.randint(301, 400)),
+                )
+                for signal_id in SeasonalSignal.objects.values_list('id', flat=True)
+            ], batch_size=BATCH_SIZE)
+        BotState.get_state()
@@ -0,0 +1,243 @@
+"""
+Команда для замера производительности check_signals и manage_signals
+"""
+import json
+import logging
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import time as dt_time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from signals.models import SeasonalSignal, Symbol
+from trading_bot import redis_client
+from trading_bot.bot_signal_manager import BotSignalManager
+from trading_bot.contract_cache import contract_cache
+from trading_bot.models import BotSeasonalSignal, SignalSyncState, TradeStatus
+from trading_bot.seasonal_calendar import signal_dates
+from trading_bot.signal_manager import SignalManager
+from trading_bot.simulator import FakeIB, SimulatorConfig
+
+BATCH_SIZE = 1000
+
+
+class QueryCounter:
+    """Counts queries executed on the connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет тестовую базу синтетическими сигналами и замеряет время, '
+        'число запросов и пик памяти check_signals и manage_signals (IB - симулятор). '
+        'Результат выводится в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Количество SeasonalSignal через запятую')
+        parser.add_argument('--symbols', type=int, default=50,
+                            help='Количество инструментов')
+        parser.add_argument('--due-fraction', type=float, default=0.01,
+                            help='Доля сигналов с наступившим входом или выходом')
+        parser.add_argument('--latency', type=float, default=0.0,
+                            help='Задержка запросов симулятора IB, мс')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default=None, help='Файл для JSON результата')
+        parser.add_argument('--verbose-logs', action='store_true',
+                            help='Не отключать логи бота во время замеров')
+
+    def handle(self, *args, **options):
+        # The benchmark must not touch caches and queues of the running bot
+        redis_client.disable()
+        if not options['verbose_logs']:
+            logging.disable(logging.WARNING)
+
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = []
+            for size in sizes:
+                self.stderr.write(f'Замер для {size} сигналов...')
+                results.extend(self._run_size(size, options))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            logging.disable(logging.NOTSET)
+
+        report = json.dumps({
+            'commit': self._commit(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'symbols': options['symbols'],
+            'due_fraction': options['due_fraction'],
+            'latency_ms': options['latency'],
+            'results': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+        self.stdout.write(report)
+
+    def _run_size(self, size: int, options) -> list[dict]:
+        rng = random.Random(options['seed'])
+        self._clear()
+        symbols = self._seed_symbols(options['symbols'])
+        signals = self._seed_signals(size, symbols, rng)
+
+        results = [self._measure(
+            'check_signals_initial', size, lambda: SignalManager().check_signals(full=True)
+        )]
+
+        self._seed_bot_signals(signals, options['due_fraction'], rng)
+        config = SimulatorConfig(
+            request_latency=(0, options['latency'] / 1000),
+            confirm_latency=(0, options['latency'] / 1000),
+            seed=options['seed'],
+        )
+        results.append(self._measure(
+            'check_signals', size, lambda: SignalManager().check_signals(full=True)
+        ))
+        # Synced after the last edit; update() leaves auto_now alone
+        now = timezone.now()
+        SeasonalSignal.objects.update(updated_at=now - timedelta(days=1))
+        SignalSyncState.objects.update_or_create(
+            id=1, defaults={'last_synced_at': now, 'last_full_sync_at': now}
+        )
+        results.append(self._measure(
+            'check_signals_incremental', size, lambda: SignalManager().check_signals(full=False)
+        ))
+        results.append(self._measure(
+            'manage_signals', size, lambda: self._manage_signals(config)
+        ))
+        return results
+
+    def _measure(self, operation: str, size: int, func) -> dict:
+        """
+        Runs the operation twice inside rolled back transactions: once for
+        wall time and query count, once under tracemalloc for peak memory
+        """
+        counter = QueryCounter()
+        with transaction.atomic():
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                func()
+                wall_time = time.perf_counter() - started
+            transaction.set_rollback(True)
+
+        with transaction.atomic():
+            tracemalloc.start()
+            try:
+                func()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            transaction.set_rollback(True)
+
+        return {
+            'operation': operation,
+            'size': size,
+            'wall_time': round(wall_time, 4),
+            'queries': counter.count,
+            'peak_memory_bytes': peak,
+        }
+
+    @staticmethod
+    def _manage_signals(config: SimulatorConfig) -> None:
+        contract_cache.clear()
+        ib = FakeIB(config)
+        ib.connect()
+        BotSignalManager(ib).manage_signals()
+
+    @staticmethod
+    def _clear() -> None:
+        SignalSyncState.objects.all().delete()
+        BotSeasonalSignal.objects.all().delete()
+        SeasonalSignal.objects.all().delete()
+        Symbol.objects.all().delete()
+
+    @staticmethod
+    def _seed_symbols(count: int) -> list[Symbol]:
+        Symbol.objects.bulk_create([
+            Symbol(financial_instrument=f'S{index:04d}', company_name=f'Symbol {index}', exchange='CME')
+            for index in range(count)
+        ])
+        return list(Symbol.objects.all())
+
+    @staticmethod
+    def _seed_signals(size: int, symbols: list[Symbol], rng: random.Random) -> list[SeasonalSignal]:
+        signals = []
+        for index in range(size):
+            signals.append(SeasonalSignal(
+                magic_number=index + 1,
+                symbol=rng.choice(symbols),
+                stoploss=rng.choice([5, 10, 20]),
+                stoploss_type='POINTS',
+                risk=1,
+                direction=rng.choice(['LONG', 'SHORT']),
+                entry_month=rng.randint(1, 12),
+                entry_day=rng.randint(1, 28),
+                takeprofit_month=rng.randint(1, 12),
+                takeprofit_day=rng.randint(1, 28),
+                open_time=dt_time(rng.randint(0, 23), rng.choice([0, 30])),
+                close_time=dt_time(rng.randint(0, 23), rng.choice([0, 30])),
+            ))
+        SeasonalSignal.objects.bulk_create(signals, batch_size=BATCH_SIZE)
+        return list(SeasonalSignal.objects.all())
+
+    @staticmethod
+    def _seed_bot_signals(signals: list[SeasonalSignal], due_fraction: float,
+                          rng: random.Random) -> None:
+        """
+        One BotSeasonalSignal per seasonal signal for the current year, as
+        check_signals creates them; a fraction is made due for entry or exit
+        """
+        now = timezone.now()
+        year = now.year
+        dates = signal_dates(
+            signals, [year] * len(signals), [year] * len(signals), ZoneInfo(settings.TIME_ZONE)
+        )
+        rows = []
+        for signal, (entry_date, exit_date) in zip(signals, dates):
+            row = BotSeasonalSignal(signal=signal, entry_date=entry_date, exit_date=exit_date)
+            if rng.random() < due_fraction:
+                if rng.random() < 0.5:
+                    row.entry_date = now - timedelta(minutes=1)
+                    row.exit_date = now + timedelta(days=1)
+                else:
+                    row.entry_date = now - timedelta(days=1)
+                    row.exit_date = now - timedelta(minutes=1)
+                    row.order_id = rng.randint(1, 10 ** 6)
+            elif exit_date <= now:
+                # Past signals are closed, as the bot leaves them
+                row.status = TradeStatus.CLOSE
+            elif entry_date <= now:
+                # Entered earlier this year, waiting for their exit
+                row.status = TradeStatus.OPEN
+                row.order_id = rng.randint(1, 10 ** 6)
+                row.stop_order_id = rng.randint(1, 10 ** 6)
+            rows.append(row)
+        BotSeasonalSignal.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+    @staticmethod
+    def _commit() -> str | None:
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except Exception:
+            return None
@@ -0,0 +1,19 @@
+"""
+Команда для включения подробной трассировки бота во время работы
+"""
+from django.core.management.base import BaseCommand
+from trading_bot.structured_logging import set_tracing
+
+
+class Command(BaseCommand):
+    help = 'Включает или выключает подробные логи шагов бота (DEBUG)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('state', choices=['on', 'off'])
+
+    def handle(self, *args, **options):
+        enabled = options['state'] == 'on'
+        set_tracing(enabled)
+        self.stdout.write(self.style.SUCCESS(
+            'Трассировка включена' if enabled else 'Трассировка выключена'
+        ))
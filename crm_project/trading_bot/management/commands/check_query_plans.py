@@ -0,0 +1,193 @@
+"""
+Команда для проверки планов запросов бота к BotSeasonalSignal
+"""
+import json
+import logging
+import random
+import statistics
+import time
+from datetime import time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from signals.models import SeasonalSignal, Symbol
+from trading_bot import redis_client
+from trading_bot.bot_signal_manager import BotSignalManager
+from trading_bot.models import BotSeasonalSignal, TradeStatus
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет тестовую базу историей BotSeasonalSignal и проверяет, что горячие '
+        'запросы бота используют свои индексы. Выводит планы и время запросов '
+        'с индексами и без них в JSON; код возврата 1, если индекс не используется'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--signals', type=int, default=20000,
+                            help='Количество SeasonalSignal')
+        parser.add_argument('--years', type=int, default=6,
+                            help='Лет истории на сигнал (строк BotSeasonalSignal на сигнал)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Повторов каждого запроса')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default=None, help='Файл для JSON результата')
+
+    def handle(self, *args, **options):
+        redis_client.disable()
+        logging.disable(logging.WARNING)
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            rows = self._seed(options['signals'], options['years'], random.Random(options['seed']))
+            results = self._run(options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            logging.disable(logging.NOTSET)
+
+        report = json.dumps({
+            'database': connection.vendor,
+            'rows': rows,
+            'results': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+        self.stdout.write(report)
+
+        missing = [result['query'] for result in results if not result['index_used']]
+        if missing:
+            raise CommandError(f'Индекс не используется: {", ".join(missing)}')
+
+    @staticmethod
+    def _queries():
+        """
+        Hot queries of the bot and the index each of them should use
+        """
+        now = timezone.now()
+        signal_ids = list(
+            BotSeasonalSignal.objects.order_by('?').values_list('signal_id', flat=True)[:50]
+        )
+        perm_id = (
+            BotSeasonalSignal.objects.filter(order_id__isnull=False)
+            .values_list('order_id', 'stop_order_id').first()
+        )
+        return [
+            ('actionable_signals', 'bot_signal_open_',
+             BotSignalManager.get_actionable_signals(now)),
+            # BotSignalManager._expire_missed_entries
+            ('missed_entries', 'bot_signal_open_exit_idx',
+             BotSeasonalSignal.objects.filter(order_id__isnull=True, exit_date__lte=now)
+             .exclude(status=TradeStatus.CLOSE)),
+            # DeadlineScheduler.rebuild
+            ('scheduler_rebuild', 'bot_signal_open_',
+             BotSeasonalSignal.objects.exclude(status=TradeStatus.CLOSE)
+             .filter(exit_date__gt=now, entry_date__lte=now + timedelta(days=1))
+             .values_list('id', 'entry_date', 'exit_date', 'order_id')),
+            # SignalManager._plan_changes of an incremental sync
+            ('incremental_sync', 'bot_signal_signal_created_idx',
+             BotSeasonalSignal.objects.filter(signal_id__in=signal_ids)
+             .filter(Q(entry_date__gt=now) | Q(created_at__year=now.year))),
+            ('order_by_perm_id', 'bot_signal_order_id_idx',
+             BotSeasonalSignal.objects.filter(order_id=perm_id[0])),
+            ('stop_order_by_perm_id', 'bot_signal_stop_order_id_idx',
+             BotSeasonalSignal.objects.filter(stop_order_id=perm_id[1])),
+        ]
+
+    def _run(self, repeat: int) -> list[dict]:
+        results = []
+        for name, index, queryset in self._queries():
+            plan = queryset.explain()
+            results.append({
+                'query': name,
+                'expected_index': index,
+                'index_used': index in plan,
+                'plan': plan.splitlines(),
+                'wall_time_indexed': self._time(queryset, repeat),
+            })
+
+        # The same queries without the bot's indexes, for comparison
+        indexes = BotSeasonalSignal._meta.indexes
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(BotSeasonalSignal, index)
+        try:
+            for result, (_, _, queryset) in zip(results, self._queries()):
+                result['wall_time_unindexed'] = self._time(queryset, repeat)
+        finally:
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(BotSeasonalSignal, index)
+        return results
+
+    @staticmethod
+    def _time(queryset, repeat: int) -> float:
+        """
+        Median wall time of fetching the queryset, seconds
+        """
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append(time.perf_counter() - started)
+        return round(statistics.median(timings), 5)
+
+    @staticmethod
+    def _seed(signals: int, years: int, rng: random.Random) -> int:
+        """
+        One row per signal and year: past years are closed, the current year
+        is awaiting, open or closed, as the bot leaves them
+        """
+        symbols = [
+            Symbol(financial_instrument=f'S{index:04d}', company_name=f'Symbol {index}', exchange='CME')
+            for index in range(50)
+        ]
+        Symbol.objects.bulk_create(symbols)
+        symbols = list(Symbol.objects.all())
+        SeasonalSignal.objects.bulk_create([
+            SeasonalSignal(
+                magic_number=index + 1,
+                symbol=rng.choice(symbols),
+                stoploss=10,
+                risk=1,
+                entry_month=rng.randint(1, 12),
+                entry_day=rng.randint(1, 28),
+                takeprofit_month=rng.randint(1, 12),
+                takeprofit_day=rng.randint(1, 28),
+                open_time=dt_time(10),
+                close_time=dt_time(16),
+            )
+            for index in range(signals)
+        ], batch_size=BATCH_SIZE)
+
+        now = timezone.now()
+        rows = []
+        for signal_id in SeasonalSignal.objects.values_list('id', flat=True):
+            for age in range(years - 1, -1, -1):
+                entry_date = now - timedelta(days=365 * age + rng.randint(-180, 180))
+                exit_date = entry_date + timedelta(days=rng.randint(1, 90))
+                row = BotSeasonalSignal(signal_id=signal_id, entry_date=entry_date, exit_date=exit_date)
+                if exit_date <= now:
+                    row.status = TradeStatus.CLOSE
+                    row.order_id = rng.randint(1, 10 ** 9)
+                    row.stop_order_id = rng.randint(1, 10 ** 9)
+                elif entry_date <= now:
+                    row.status = TradeStatus.OPEN
+                    row.order_id = rng.randint(1, 10 ** 9)
+                    row.stop_order_id = rng.randint(1, 10 ** 9)
+                rows.append(row)
+        BotSeasonalSignal.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        # created_at is auto_now_add, spread it over the history as well
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {BotSeasonalSignal._meta.db_table} SET created_at = entry_date'
+            )
+            if connection.vendor in ('sqlite', 'postgresql'):
+                cursor.execute(f'ANALYZE {BotSeasonalSignal._meta.db_table}')
+        return len(rows)
@@ -0,0 +1,23 @@
+"""
+Команда для запуска резидентного торгового бота
+"""
+from django.core.management.base import BaseCommand
+from trading_bot.daemon import BotDaemon
+
+
+class Command(BaseCommand):
+    help = 'Запускает бота с постоянной сессией IB Gateway'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--client-id', type=int, default=None)
+        parser.add_argument('--interval', type=float, default=None)
+
+    def handle(self, *args, **options):
+        daemon = BotDaemon(
+            client_id=options['client_id'],
+            tick_interval=options['interval'],
+        )
+        daemon.install_signal_handlers()
+        self.stdout.write('Запуск резидентного бота...')
+        daemon.run_forever()
+        self.stdout.write(self.style.SUCCESS('Бот остановлен'))
@@ -8,11 +8,18 @@ from trading_bot.signal_manager import signal_manager
 class Command(BaseCommand):
     help = 'Проверяет и создает BotSeasonalSignal при необходимости'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Полная сверка всех сигналов, а не только измененных')
+
     def handle(self, *args, **options):
         self.stdout.write('Начинаю проверку сигналов...')
-        created_count = signal_manager.check_signals()
+        created_count, updated_count = signal_manager.check_signals(
+            full=True if options['full'] else None
+        )
         self.stdout.write(
             self.style.SUCCESS(
-                f'Проверка завершена. Создано сигналов: {created_count}'
+                f'Проверка завершена. Создано сигналов: {created_count}, '
+                f'обновлено: {updated_count}'
             )
         ) 
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""
+Latency histograms and counters in Prometheus text format
+"""
+
+import contextlib
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+
+from trading_bot.redis_client import get_redis, report_failure
+
+logger = logging.getLogger("bot")
+
+# Upper bounds of latency buckets, seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Lifetime of the snapshot published for the web app, seconds
+SNAPSHOT_TTL = 120
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f'{self.name}_total{_format_labels(self.labelnames, key)} {value}'
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets and optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """
+        Observe the duration of the block, also when it raises
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        for key, counts in sorted(values.items()):
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                yield f'{self.name}_bucket{labels} {count}'
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f'{self.name}_bucket{labels} {counts[-2]}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, key)} {counts[-2]}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, key)} {counts[-1]}'
+
+
+class MetricsRegistry:
+    """
+    Metrics of one process, rendered in Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def publish(self) -> None:
+        """
+        Store the rendered metrics in Redis for the web app endpoint
+        """
+        try:
+            get_redis().set(settings.BOT_METRICS_SNAPSHOT_KEY, self.render(), ex=SNAPSHOT_TTL)
+        except Exception as e:
+            report_failure(e)
+            logger.debug("Failed to publish metrics: %s", e)
+
+
+def published_snapshot() -> str:
+    """
+    Returns:
+        str: Metrics published by the bot process, empty if there are none
+    """
+    try:
+        snapshot = get_redis().get(settings.BOT_METRICS_SNAPSHOT_KEY)
+    except Exception as e:
+        report_failure(e)
+        return ''
+    return snapshot.decode() if snapshot else ''
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """
+    Serve /metrics of this process from a background thread
+
+    Args:
+        port: Port to listen on
+        host: Interface to bind
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics', daemon=True)
+    thread.start()
+    logger.info("Metrics endpoint listening on %s:%d/metrics", host, port)
+    return server
+
+
+# Create global metrics registry instance
+registry = MetricsRegistry()
+
+open_order_stage_seconds = registry.histogram(
+    'bot_open_order_stage_seconds',
+    'Duration of order entry stages',
+    ('stage',),
+)
+open_order_errors = registry.counter(
+    'bot_open_order_errors',
+    'Failed order entries by stage',
+    ('stage',),
+)
+contract_lookup_seconds = registry.histogram(
+    'bot_contract_lookup_seconds',
+    'Duration of contract details lookup',
+    ('source',),
+)
+gateway_requests = registry.counter(
+    'bot_gateway_requests',
+    'Coalesced gateway requests by outcome (sent, coalesced, memoized)',
+    ('method', 'outcome'),
+)
+gateway_queue_seconds = registry.histogram(
+    'bot_gateway_queue_seconds',
+    'Time a gateway request waited for pacing tokens',
+    ('request_class', 'priority'),
+)
+contract_lookup_failures = registry.counter(
+    'bot_contract_lookup_failures',
+    'Contract lookups that returned no details',
+)
+trading_hours_check_seconds = registry.histogram(
+    'bot_trading_hours_check_seconds',
+    'Duration of the trading hours check',
+)
+close_stage_seconds = registry.histogram(
+    'bot_close_stage_seconds',
+    'Duration of position close stages',
+    ('stage',),
+)
+close_results = registry.counter(
+    'bot_close_results',
+    'Closing orders by outcome',
+    ('result',),
+)
+tick_seconds = registry.histogram(
+    'bot_tick_seconds',
+    'Duration of a manage_signals tick',
+)
+tick_overlaps = registry.counter(
+    'bot_tick_overlaps',
+    'Ticks skipped because the previous tick still held the lease',
+)
+tick_fence_rejections = registry.counter(
+    'bot_tick_fence_rejections',
+    'Ticks stopped before placing orders because their lease expired',
+)
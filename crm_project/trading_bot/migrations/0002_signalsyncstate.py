@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading_bot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignalSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('last_full_sync_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Signal sync state',
+                'verbose_name_plural': 'Signal sync state',
+            },
+        ),
+    ]
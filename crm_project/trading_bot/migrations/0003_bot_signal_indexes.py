@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signals', '0002_seasonalsignal_updated_at'),
+        ('trading_bot', '0002_signalsyncstate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='botseasonalsignal',
+            index=models.Index(fields=['signal', 'created_at'], name='bot_signal_signal_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='botseasonalsignal',
+            index=models.Index(condition=models.Q(('status', 'close'), _negated=True), fields=['entry_date'], name='bot_signal_open_entry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='botseasonalsignal',
+            index=models.Index(condition=models.Q(('status', 'close'), _negated=True), fields=['exit_date'], name='bot_signal_open_exit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='botseasonalsignal',
+            index=models.Index(condition=models.Q(('order_id__isnull', False)), fields=['order_id'], name='bot_signal_order_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='botseasonalsignal',
+            index=models.Index(condition=models.Q(('stop_order_id__isnull', False)), fields=['stop_order_id'], name='bot_signal_stop_order_id_idx'),
+        ),
+        migrations.AlterField(
+            model_name='botseasonalsignal',
+            name='signal',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='bot_signals', to='signals.seasonalsignal', verbose_name='Seasonal signal'),
+        ),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from signals.models import SeasonalSignal
+from trading_bot.bot_state_cache import bot_state_cache
 
 
 class TradeStatus(models.TextChoices):
@@ -17,7 +18,9 @@ class BotSeasonalSignal(models.Model):
         SeasonalSignal,
         on_delete=models.CASCADE,
         related_name='bot_signals',
-        verbose_name='Seasonal signal'
+        verbose_name='Seasonal signal',
+        # Covered by bot_signal_signal_created_idx
+        db_index=False
     )
     entry_date = models.DateTimeField(
         verbose_name='Entry date',
@@ -57,6 +60,29 @@ class BotSeasonalSignal(models.Model):
         verbose_name = 'Trading signal'
         verbose_name_plural = 'Trading signals'
         ordering = ['-created_at']
+        indexes = [
+            # Rows of a signal, newest first, and of a given year for the signal sync
+            models.Index(fields=['signal', 'created_at'], name='bot_signal_signal_created_idx'),
+            # Actionable signals, missed entries and the deadline scheduler only
+            # look at rows that are not closed, a small part of the table
+            models.Index(
+                fields=['entry_date'], name='bot_signal_open_entry_idx',
+                condition=~models.Q(status=TradeStatus.CLOSE),
+            ),
+            models.Index(
+                fields=['exit_date'], name='bot_signal_open_exit_idx',
+                condition=~models.Q(status=TradeStatus.CLOSE),
+            ),
+            # Reconciliation with IB by permId
+            models.Index(
+                fields=['order_id'], name='bot_signal_order_id_idx',
+                condition=models.Q(order_id__isnull=False),
+            ),
+            models.Index(
+                fields=['stop_order_id'], name='bot_signal_stop_order_id_idx',
+                condition=models.Q(stop_order_id__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f'Trading signal {self.signal} ({self.entry_date.date()})'
@@ -79,3 +105,41 @@ class BotState(models.Model):
         """Получить текущее состояние бота"""
         state, created = cls.objects.get_or_create(id=1)
         return state
+
+    @classmethod
+    def cached_state(cls) -> dict:
+        """
+        Состояние бота из кэша ({'is_running', 'last_updated'}), без запроса
+        к базе, пока кэш заполнен
+        """
+        state = bot_state_cache.get()
+        if state is None:
+            row = cls.get_state()
+            state = bot_state_cache.put(row.is_running, row.last_updated)
+        return state
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Write-through after commit, so that readers never see a rolled back toggle
+        transaction.on_commit(
+            lambda: bot_state_cache.put(self.is_running, self.last_updated)
+        )
+
+
+class SignalSyncState(models.Model):
+    """Модель для хранения водяного знака синхронизации сигналов"""
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Signal sync state'
+        verbose_name_plural = 'Signal sync state'
+
+    def __str__(self):
+        return f"Signals synced at {self.last_synced_at}"
+
+    @classmethod
+    def get_state(cls):
+        """Получить текущее состояние синхронизации"""
+        state, created = cls.objects.get_or_create(id=1)
+        return state
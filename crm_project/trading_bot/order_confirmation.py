@@ -0,0 +1,112 @@
+"""
+Event-driven confirmation of placed orders
+"""
+
+import asyncio
+import logging
+import time
+
+from ib_insync import IB, OrderStatus, Trade
+
+logger = logging.getLogger('trading_bot.core.bot_signal_manager')
+
+
+class ConfirmationTimeout(Exception):
+    """Raised when the gateway did not confirm orders before the deadline"""
+
+    def __init__(self, trades: list[Trade], timeout: float):
+        self.trades = trades
+        missing = [trade.order.orderId for trade in trades if not trade.order.permId]
+        super().__init__(f"Orders {missing} not confirmed within {timeout}s")
+
+
+class OrderRejected(Exception):
+    """Raised when an order is finished by the gateway without a permId"""
+
+
+async def wait_for_confirmation(ib_connector: IB, trades: list[Trade],
+                                timeout: float) -> dict[int, float]:
+    """
+    Waits until the gateway assigned a permId to every trade.
+
+    Confirmation is driven by openOrderEvent/orderStatusEvent instead of
+    polling, so any number of brackets can wait concurrently.
+
+    Args:
+        ib_connector: IB instance the orders were placed with
+        trades: Placed trades
+        timeout: Deadline in seconds
+
+    Returns:
+        dict[int, float]: Confirmation latency in seconds per orderId
+
+    Raises:
+        ConfirmationTimeout: If some orders were not confirmed in time
+        OrderRejected: If an order was finished without confirmation
+    """
+    started = time.monotonic()
+    latencies: dict[int, float] = {}
+    done = asyncio.get_running_loop().create_future()
+
+    def check(*args) -> None:
+        for trade in trades:
+            order_id = trade.order.orderId
+            if trade.order.permId:
+                if order_id not in latencies:
+                    latencies[order_id] = time.monotonic() - started
+            elif trade.orderStatus.status in OrderStatus.DoneStates and not done.done():
+                done.set_exception(OrderRejected(
+                    f"Order {order_id} finished with status {trade.orderStatus.status}"
+                ))
+        if len(latencies) == len(trades) and not done.done():
+            done.set_result(None)
+
+    ib_connector.openOrderEvent += check
+    ib_connector.orderStatusEvent += check
+    try:
+        check()
+        await asyncio.wait_for(done, timeout)
+    except asyncio.TimeoutError:
+        raise ConfirmationTimeout(trades, timeout) from None
+    finally:
+        ib_connector.openOrderEvent -= check
+        ib_connector.orderStatusEvent -= check
+
+    for order_id, latency in latencies.items():
+        logger.info("Order %s confirmed in %.0f ms", order_id, latency * 1000)
+    return latencies
+
+
+def confirm_orders(ib_connector: IB, trades: list[Trade], timeout: float) -> dict[int, float]:
+    """
+    Synchronous wrapper around wait_for_confirmation
+    """
+    return ib_connector.run(wait_for_confirmation(ib_connector, trades, timeout))
+
+
+async def wait_for_fill(trade: Trade, timeout: float) -> bool:
+    """
+    Waits until the trade is finished, driven by its statusEvent
+
+    Args:
+        trade: Placed trade
+        timeout: Deadline in seconds
+
+    Returns:
+        bool: True if the order was filled before the deadline
+    """
+    if not trade.isDone():
+        done = asyncio.get_running_loop().create_future()
+
+        def check(*args) -> None:
+            if trade.isDone() and not done.done():
+                done.set_result(None)
+
+        trade.statusEvent += check
+        try:
+            await asyncio.wait_for(done, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            trade.statusEvent -= check
+    return trade.orderStatus.status == OrderStatus.Filled
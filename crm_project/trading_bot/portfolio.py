@@ -0,0 +1,88 @@
+"""
+Per-tick snapshot of positions and open orders
+"""
+
+import logging
+from collections import defaultdict
+
+from ib_insync import Contract, IB, Position, Trade
+
+logger = logging.getLogger('trading_bot.core.bot_signal_manager')
+
+
+class PortfolioSnapshot:
+    """
+    Positions and open orders taken once per tick and indexed for lookups
+    by conId/symbol and by permId/parent order id.
+    """
+
+    def __init__(self, positions: list[Position], trades: list[Trade]):
+        """
+        Args:
+            positions: Current positions
+            trades: Known trades including open orders of all clients
+        """
+        self.positions_by_con_id: dict[int, Position] = {}
+        self.positions_by_symbol: dict[str, Position] = {}
+        for position in positions:
+            if position.position == 0:
+                continue
+            self.positions_by_con_id[position.contract.conId] = position
+            self.positions_by_symbol.setdefault(position.contract.symbol, position)
+
+        self.trades_by_perm_id: dict[int, Trade] = {}
+        self.children_by_parent_id: dict[int, list[Trade]] = defaultdict(list)
+        for trade in trades:
+            if trade.order.permId:
+                self.trades_by_perm_id[trade.order.permId] = trade
+            if trade.order.parentId:
+                self.children_by_parent_id[trade.order.parentId].append(trade)
+
+        logger.info(
+            f"Portfolio snapshot: {len(self.positions_by_con_id)} positions, "
+            f"{len(self.trades_by_perm_id)} orders"
+        )
+
+    @classmethod
+    def load(cls, ib_connector: IB) -> "PortfolioSnapshot":
+        """
+        Take a snapshot, requesting open orders of all clients once
+        """
+        ib_connector.reqAllOpenOrders()
+        return cls(ib_connector.positions(), ib_connector.trades())
+
+    @classmethod
+    async def load_async(cls, ib_connector: IB) -> "PortfolioSnapshot":
+        """
+        Asynchronous counterpart of load
+        """
+        await ib_connector.reqAllOpenOrdersAsync()
+        return cls(ib_connector.positions(), ib_connector.trades())
+
+    def position_for(self, contract: Contract) -> Position | None:
+        """
+        Returns:
+            Position | None: Non-zero position in the contract, if any
+        """
+        position = self.positions_by_con_id.get(contract.conId)
+        if position is None:
+            position = self.positions_by_symbol.get(contract.symbol)
+        return position
+
+    def stop_trade_for(self, stop_perm_id: int | None, parent_order_id: int | None) -> Trade | None:
+        """
+        Finds the protective stop of a bracket.
+
+        Args:
+            stop_perm_id: permId of the stop order, if it was confirmed
+            parent_order_id: orderId of the parent limit order
+
+        Returns:
+            Trade | None: Active stop order trade
+        """
+        if stop_perm_id:
+            return self.trades_by_perm_id.get(stop_perm_id)
+        for trade in self.children_by_parent_id.get(parent_order_id, []):
+            if trade.order.orderType == 'STP' and not trade.isDone():
+                return trade
+        return None
@@ -0,0 +1,131 @@
+"""
+Current price lookup for order entry
+"""
+
+import asyncio
+import logging
+import math
+import time
+
+from django.conf import settings
+from ib_insync import Contract, IB
+
+logger = logging.getLogger('trading_bot.core.bot_signal_manager')
+
+# Timeout for a market data snapshot, seconds
+SNAPSHOT_TIMEOUT = 3
+# Timeout for the fallback bar request, seconds
+BARS_TIMEOUT = 15
+
+
+class LastPriceCache:
+    """
+    Last known price per conId with a staleness bound
+    """
+
+    def __init__(self):
+        self._prices: dict[int, tuple[float, float]] = {}
+
+    def get(self, con_id: int, max_age: float) -> float | None:
+        """
+        Returns:
+            float | None: Price younger than max_age seconds, if any
+        """
+        entry = self._prices.get(con_id)
+        if entry is None:
+            return None
+        price, updated_at = entry
+        if time.monotonic() - updated_at > max_age:
+            return None
+        return price
+
+    def update(self, con_id: int, price: float) -> None:
+        self._prices[con_id] = (price, time.monotonic())
+
+
+# Create global price cache instance
+last_prices = LastPriceCache()
+
+
+class PriceProvider:
+    """
+    Returns the current price of a contract from the cheapest source that
+    answers: the last-price cache, a market data snapshot, then a small
+    window of 1-minute bars. The order of gateway sources is configured by
+    settings.BOT_PRICE_SOURCES.
+    """
+
+    def __init__(self, ib_connector: IB, sources: list[str] = None,
+                 max_age: float = None):
+        """
+        Args:
+            ib_connector: Connected IB instance
+            sources: Gateway sources in order of preference ("snapshot", "bars")
+            max_age: Maximum age of a cached price in seconds
+        """
+        self.ib_connector = ib_connector
+        self.sources = sources or settings.BOT_PRICE_SOURCES
+        self.max_age = settings.BOT_PRICE_MAX_AGE if max_age is None else max_age
+        self._fetchers = {
+            "snapshot": self._snapshot_price,
+            "bars": self._bars_price,
+        }
+
+    def get_price(self, contract: Contract) -> float:
+        """
+        Synchronous price lookup for code running outside the event loop
+        """
+        cached = last_prices.get(contract.conId, self.max_age)
+        if cached is not None:
+            return cached
+        return self.ib_connector.run(self.get_price_async(contract))
+
+    async def get_price_async(self, contract: Contract) -> float:
+        """
+        Args:
+            contract: Qualified contract
+
+        Returns:
+            float: Current price
+
+        Raises:
+            Exception: If no source returned a price
+        """
+        cached = last_prices.get(contract.conId, self.max_age)
+        if cached is not None:
+            return cached
+
+        for source in self.sources:
+            try:
+                price = await self._fetchers[source](contract)
+            except Exception as e:
+                logger.warning("Price source '%s' failed for %s: %s", source, contract.symbol, e)
+                continue
+            if price is not None and not math.isnan(price) and price > 0:
+                last_prices.update(contract.conId, price)
+                logger.info("Price for %s from %s: %s", contract.symbol, source, price)
+                return price
+            logger.info("Price source '%s' returned no price for %s", source, contract.symbol)
+        raise Exception(f"Failed to get price for {contract.symbol}")
+
+    async def _snapshot_price(self, contract: Contract) -> float | None:
+        tickers = await asyncio.wait_for(
+            self.ib_connector.reqTickersAsync(contract), SNAPSHOT_TIMEOUT
+        )
+        if not tickers:
+            return None
+        return float(tickers[0].marketPrice())
+
+    async def _bars_price(self, contract: Contract) -> float | None:
+        bars = await self.ib_connector.reqHistoricalDataAsync(
+            contract,
+            endDateTime='',
+            durationStr='1800 S',
+            barSizeSetting='1 min',
+            whatToShow='TRADES',
+            useRTH=False,
+            timeout=BARS_TIMEOUT,
+        )
+        if not bars:
+            return None
+        return float(bars[-1].close)
@@ -0,0 +1,16 @@
+"""
+Model signal receivers of the trading bot
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from trading_bot.models import BotSeasonalSignal
+from trading_bot.scheduler import mark_signals_dirty
+
+
+@receiver(post_save, sender=BotSeasonalSignal)
+@receiver(post_delete, sender=BotSeasonalSignal)
+def bot_signal_changed(sender, instance, **kwargs):
+    """Reschedule entry/exit events of the changed signal in the daemon"""
+    mark_signals_dirty([instance.pk])
@@ -0,0 +1,60 @@
+"""
+Shared Redis connection for trading bot processes
+"""
+
+import time
+
+import redis
+from django.conf import settings
+
+# Seconds to stop using Redis after a connection failure, so that the bot
+# hot path does not pay a socket timeout on every call while Redis is down
+RETRY_AFTER = 30
+
+_client = None
+_unavailable_until = 0.0
+
+
+def get_redis() -> redis.Redis:
+    """
+    Returns a lazily created Redis client shared by the whole process
+
+    Returns:
+        redis.Redis: Client connected to settings.REDIS_URL
+
+    Raises:
+        redis.ConnectionError: If Redis failed recently and is not retried yet
+    """
+    global _client
+    if time.monotonic() < _unavailable_until:
+        raise redis.ConnectionError("Redis is temporarily marked unavailable")
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=2,
+            socket_connect_timeout=2,
+        )
+    return _client
+
+
+def report_failure(error: Exception) -> None:
+    """
+    Stop using Redis for RETRY_AFTER seconds after a connection problem
+
+    Args:
+        error: Exception raised by a Redis call
+    """
+    global _unavailable_until
+    if time.monotonic() < _unavailable_until:
+        return
+    if isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+        _unavailable_until = time.monotonic() + RETRY_AFTER
+
+
+def disable() -> None:
+    """
+    Stop using Redis in this process, e.g. for offline benchmarks that must
+    not touch the shared caches and queues of the running bot
+    """
+    global _unavailable_until
+    _unavailable_until = float('inf')
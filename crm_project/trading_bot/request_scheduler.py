@@ -0,0 +1,265 @@
+"""
+Pacing of gateway requests with token buckets and request priorities
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import enum
+import heapq
+import itertools
+import logging
+import time
+
+from django.conf import settings
+from ib_insync import IB
+
+from trading_bot import metrics
+
+logger = logging.getLogger('trading_bot.core.bot_signal_manager')
+
+# Bucket shared by every request, IB counts all API messages together
+MESSAGES = 'messages'
+
+# Paced async requests by request class; their sync counterparts run them on the loop
+REQUEST_CLASSES = {
+    'reqContractDetailsAsync': 'contract_details',
+    'reqHistoricalDataAsync': 'historical',
+    'reqTickersAsync': 'market_data',
+    'reqAllOpenOrdersAsync': 'account',
+    'accountSummaryAsync': 'account',
+    'reqCurrentTimeAsync': 'clock',
+}
+SYNC_REQUESTS = {
+    'reqContractDetails': 'reqContractDetailsAsync',
+    'reqHistoricalData': 'reqHistoricalDataAsync',
+    'reqTickers': 'reqTickersAsync',
+    'reqAllOpenOrders': 'reqAllOpenOrdersAsync',
+    'reqCurrentTime': 'reqCurrentTimeAsync',
+}
+
+
+class Priority(enum.IntEnum):
+    """Order in which waiting requests are served, lower first"""
+    EXIT = 0  # closing orders
+    STOP = 1  # stop order management
+    NORMAL = 2  # lookups, snapshots
+    ENTRY = 3  # new entries
+
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    'request_priority', default=Priority.NORMAL
+)
+
+
+@contextlib.contextmanager
+def request_priority(priority: Priority):
+    """
+    Requests sent inside the block, including from tasks started in it,
+    are queued with the given priority
+
+    Example:
+        with request_priority(Priority.EXIT):
+            await gateway.placeOrderAsync(contract, close_order)
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Allows rate requests per second on average and bursts of up to capacity
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """
+        Returns:
+            float: Seconds until a token is available, 0 if it is now
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class RequestScheduler:
+    """
+    Paces requests to one gateway session.
+
+    Each request takes a token from the shared message bucket and from the
+    bucket of its request class, if that class has one. A request that
+    cannot go at once waits in a priority queue: when tokens come back the
+    waiter with the lowest priority value is served first, so exits and
+    stop management overtake queued entries. A waiter blocked only by its
+    own class (historical data pacing) does not hold up the other classes.
+    """
+
+    def __init__(self, messages_per_second: float = None, limits: dict = None):
+        """
+        Args:
+            messages_per_second: Rate of the shared message bucket
+            limits: {request class: (requests per second, burst)}
+        """
+        rate = messages_per_second or settings.BOT_PACING_MESSAGES
+        # A full burst plus one second at the rate stays within 1.25 * rate messages
+        self.buckets = {MESSAGES: TokenBucket(rate, max(1.0, rate / 4))}
+        for request_class, (class_rate, burst) in (limits or settings.BOT_PACING_LIMITS).items():
+            self.buckets[request_class] = TokenBucket(class_rate, burst)
+        self._waiters: list[tuple] = []
+        self._sequence = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def acquire(self, request_class: str) -> None:
+        """
+        Wait until a request of the class may be sent, with the priority of
+        the current context
+        """
+        priority = _priority.get()
+        enqueued = time.monotonic()
+        if not self._waiters and self._wait_time(request_class, enqueued) == 0:
+            self._take(request_class)
+            metrics.gateway_queue_seconds.observe(
+                0, request_class=request_class, priority=priority.name.lower()
+            )
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), request_class, enqueued, future))
+        logger.debug("Queued %s request, %d waiting", request_class, len(self._waiters))
+        self._dispatch()
+        await future
+
+    def _wait_time(self, request_class: str, now: float) -> float:
+        bucket = self.buckets.get(request_class)
+        return max(self.buckets[MESSAGES].wait_time(now), bucket.wait_time(now) if bucket else 0.0)
+
+    def _take(self, request_class: str) -> None:
+        self.buckets[MESSAGES].take()
+        if request_class in self.buckets:
+            self.buckets[request_class].take()
+
+    def _dispatch(self) -> None:
+        """
+        Serve waiters in priority order while tokens last, then schedule
+        the next pass for when the first blocked waiter gets its tokens
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        retry_in = None
+        remaining = []
+        messages_blocked = False
+        for waiter in sorted(self._waiters):
+            priority, _, request_class, enqueued, future = waiter
+            if future.done():
+                # The caller gave up (timeout, cancelled tick)
+                continue
+            if not messages_blocked:
+                delay = self.buckets[MESSAGES].wait_time(now)
+                messages_blocked = delay > 0
+            bucket = self.buckets.get(request_class)
+            if not messages_blocked and bucket is not None:
+                delay = bucket.wait_time(now)
+            if messages_blocked or delay > 0:
+                remaining.append(waiter)
+                retry_in = delay if retry_in is None else min(retry_in, delay)
+                continue
+            self._take(request_class)
+            metrics.gateway_queue_seconds.observe(
+                now - enqueued, request_class=request_class, priority=priority.name.lower()
+            )
+            future.set_result(None)
+
+        self._waiters = remaining
+        heapq.heapify(self._waiters)
+        if remaining:
+            self._timer = asyncio.get_running_loop().call_later(retry_in, self._dispatch)
+
+
+class PacedGateway:
+    """
+    Proxy in front of an IB instance that sends every request through the
+    scheduler. Orders have async variants (placeOrderAsync, cancelOrderAsync)
+    for code running on the event loop, so that they can wait in the queue
+    without blocking it. Everything else is delegated to the wrapped IB
+    instance.
+    """
+
+    def __init__(self, ib_connector: IB, scheduler: RequestScheduler = None):
+        """
+        Args:
+            ib_connector: IB instance to wrap
+            scheduler: Scheduler of the session
+        """
+        self.ib = ib_connector
+        self.scheduler = scheduler or RequestScheduler()
+
+    def __getattr__(self, name: str):
+        if name in REQUEST_CLASSES:
+            return self._paced(name)
+        if name in SYNC_REQUESTS:
+            paced = self._paced(SYNC_REQUESTS[name])
+            return lambda *args, **kwargs: self.ib.run(paced(*args, **kwargs))
+        return getattr(self.ib, name)
+
+    def _paced(self, method: str):
+        request = getattr(self.ib, method)
+
+        async def paced(*args, **kwargs):
+            await self.scheduler.acquire(REQUEST_CLASSES[method])
+            return await request(*args, **kwargs)
+        return paced
+
+    async def reqCurrentTimeSampleAsync(self) -> tuple[float, object]:
+        """
+        Gateway time for clock sampling. The request is queued ahead of
+        everything else and timestamped when it leaves the queue, so the
+        queue wait does not widen the round-trip of the sample.
+
+        Returns:
+            tuple: (monotonic time the request was sent, gateway time)
+        """
+        with request_priority(Priority.EXIT):
+            await self.scheduler.acquire(REQUEST_CLASSES['reqCurrentTimeAsync'])
+        sent = time.monotonic()
+        return sent, await self.ib.reqCurrentTimeAsync()
+
+    async def placeOrderAsync(self, contract, order):
+        await self.scheduler.acquire('orders')
+        return self.ib.placeOrder(contract, order)
+
+    async def cancelOrderAsync(self, order):
+        await self.scheduler.acquire('orders')
+        return self.ib.cancelOrder(order)
+
+    def placeOrder(self, contract, order):
+        return self.ib.run(self.placeOrderAsync(contract, order))
+
+    def cancelOrder(self, order):
+        return self.ib.run(self.cancelOrderAsync(order))
+
+
+def get_paced_gateway(ib_connector: IB) -> PacedGateway:
+    """
+    Returns the paced gateway of the given IB instance, creating it once so
+    that all signal managers of one session share its token buckets. The
+    gateway is stored on the instance rather than in a weak-keyed registry:
+    it refers back to the instance, so such an entry would never be dropped.
+    """
+    gateway = vars(ib_connector).get('_paced_gateway')
+    if gateway is None:
+        gateway = ib_connector._paced_gateway = PacedGateway(ib_connector)
+    return gateway
@@ -0,0 +1,198 @@
+"""
+Deadline scheduler for signal entry and exit instants
+"""
+
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Callable
+
+from django.conf import settings
+
+from trading_bot.models import BotSeasonalSignal, TradeStatus
+from trading_bot.redis_client import get_redis, report_failure
+
+logger = logging.getLogger("bot")
+
+ENTRY = "entry"
+EXIT = "exit"
+RETRY = "retry"
+
+
+def mark_signals_dirty(signal_ids) -> None:
+    """
+    Tell the running daemon that these BotSeasonalSignal rows changed
+
+    Args:
+        signal_ids: Ids of created, updated or deleted rows
+    """
+    signal_ids = list(signal_ids)
+    if not signal_ids:
+        return
+    try:
+        get_redis().sadd(settings.BOT_SCHEDULER_DIRTY_KEY, *signal_ids)
+    except Exception as e:
+        report_failure(e)
+        logger.debug(f"Failed to mark signals dirty: {str(e)}")
+
+
+class DeadlineScheduler:
+    """
+    Priority queue of upcoming entry/exit instants of BotSeasonalSignal.
+
+    The queue covers a limited horizon and is rebuilt from the database
+    periodically. Between rebuilds it is updated incrementally for rows
+    reported through mark_signals_dirty. Outdated heap entries are skipped
+    lazily when they reach the top. Instants are compared with the given
+    clock, which should be the one the tick decides what is due by. Work
+    that was due but did not happen (market closed, failed placement) is
+    re-armed with schedule_retry.
+    """
+
+    def __init__(self, horizon: float = None, rebuild_interval: float = None,
+                 clock: Callable[[], float] = None):
+        """
+        Args:
+            horizon: How far ahead events are loaded, seconds
+            rebuild_interval: How often the queue is rebuilt from scratch, seconds
+            clock: Current epoch, local wall clock by default
+        """
+        self.clock = clock or time.time
+        self.horizon = horizon or settings.BOT_SCHEDULER_HORIZON
+        self.rebuild_interval = rebuild_interval or settings.BOT_SCHEDULER_REBUILD_INTERVAL
+        self._heap: list[tuple[float, int, str]] = []
+        self._events: dict[int, dict[str, float]] = {}
+        self._horizon_end = 0.0
+        self._rebuilt_at = None
+
+    def rebuild(self) -> None:
+        """
+        Reload all events within the horizon from the database
+        """
+        now = self.clock()
+        self._horizon_end = now + self.horizon
+        start = datetime.fromtimestamp(now, tz=dt_timezone.utc)
+        end = start + timedelta(seconds=self.horizon)
+        rows = (
+            BotSeasonalSignal.objects.exclude(status=TradeStatus.CLOSE)
+            .filter(exit_date__gt=start, entry_date__lte=end)
+            .values_list("id", "entry_date", "exit_date", "order_id")
+        )
+        retries = {
+            signal_id: events[RETRY] for signal_id, events in self._events.items()
+            if events.get(RETRY, 0) > now
+        }
+        self._heap = []
+        self._events = {}
+        for row in rows:
+            self._heap.extend(self._add(*row, now=now))
+        for signal_id, instant in retries.items():
+            if signal_id in self._events:
+                self._events[signal_id][RETRY] = instant
+                self._heap.append((instant, signal_id, RETRY))
+        heapq.heapify(self._heap)
+        self._rebuilt_at = time.monotonic()
+        logger.info(f"Deadline scheduler rebuilt: {len(self._heap)} events")
+
+    def rebuild_if_needed(self) -> None:
+        if self._rebuilt_at is None or time.monotonic() - self._rebuilt_at >= self.rebuild_interval:
+            self.rebuild()
+
+    def apply_changes(self) -> bool:
+        """
+        Reload rows reported as changed since the last call
+
+        Returns:
+            bool: True if a changed row is already due and needs a tick now
+        """
+        try:
+            client = get_redis()
+            pipeline = client.pipeline()
+            pipeline.smembers(settings.BOT_SCHEDULER_DIRTY_KEY)
+            pipeline.delete(settings.BOT_SCHEDULER_DIRTY_KEY)
+            dirty, _ = pipeline.execute()
+        except Exception as e:
+            report_failure(e)
+            logger.debug(f"Failed to read changed signals: {str(e)}")
+            return False
+        if not dirty:
+            return False
+
+        signal_ids = [int(signal_id) for signal_id in dirty]
+        for signal_id in signal_ids:
+            self._events.pop(signal_id, None)
+        now = self.clock()
+        rows = (
+            BotSeasonalSignal.objects.filter(id__in=signal_ids)
+            .exclude(status=TradeStatus.CLOSE)
+            .values_list("id", "entry_date", "exit_date", "order_id")
+        )
+        due = False
+        for signal_id, entry_date, exit_date, order_id in rows:
+            if order_id:
+                due = due or exit_date.timestamp() <= now
+            else:
+                due = due or entry_date.timestamp() <= now < exit_date.timestamp()
+            for event in self._add(signal_id, entry_date, exit_date, order_id, now=now):
+                heapq.heappush(self._heap, event)
+        logger.info(f"Deadline scheduler updated for {len(signal_ids)} changed signals")
+        return due
+
+    def schedule_retry(self, signal_id: int, instant: float) -> None:
+        """
+        Wake up for the signal again at the given epoch
+
+        Args:
+            signal_id: Id of the signal whose due work did not happen
+            instant: Epoch of the next attempt
+        """
+        self._events.setdefault(signal_id, {})[RETRY] = instant
+        heapq.heappush(self._heap, (instant, signal_id, RETRY))
+
+    def next_deadline(self) -> float | None:
+        """
+        Returns:
+            float | None: Epoch of the earliest pending event
+        """
+        while self._heap:
+            instant, signal_id, kind = self._heap[0]
+            if self._events.get(signal_id, {}).get(kind) == instant:
+                return instant
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: float) -> list[tuple[float, int, str]]:
+        """
+        Remove and return all events due at the given moment
+
+        Args:
+            now: Current epoch
+        """
+        due = []
+        while True:
+            instant = self.next_deadline()
+            if instant is None or instant > now:
+                return due
+            event = heapq.heappop(self._heap)
+            self._events[event[1]].pop(event[2], None)
+            due.append(event)
+
+    def _add(self, signal_id: int, entry_date: datetime, exit_date: datetime,
+             order_id: int | None, now: float) -> list[tuple[float, int, str]]:
+        """
+        Register future events of one row within the horizon
+
+        Returns:
+            list: New heap entries (the caller pushes or heapifies them)
+        """
+        events = {}
+        if not order_id:
+            events[ENTRY] = entry_date.timestamp()
+        events[EXIT] = exit_date.timestamp()
+        events = {
+            kind: instant for kind, instant in events.items()
+            if now < instant <= self._horizon_end
+        }
+        self._events[signal_id] = events
+        return [(instant, signal_id, kind) for kind, instant in events.items()]
@@ -0,0 +1,131 @@
+"""
+Entry and exit instants of seasonal signals computed in bulk
+"""
+
+from datetime import datetime, time
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# Number of memoized (month, day, time, year, tz) instants
+MEMO_SIZE = 65536
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def local_instant(month: int, day: int, moment: time, year: int, tz: ZoneInfo) -> datetime:
+    """
+    Returns:
+        datetime: Wall-clock date and time in the given time zone
+    """
+    return datetime(year, month, day, moment.hour, moment.minute, tzinfo=tz)
+
+
+def _instants(months: np.ndarray, days: np.ndarray, minutes: np.ndarray,
+              years: np.ndarray, tz: ZoneInfo) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Resolve wall-clock dates into instants.
+
+    Dates are validated as datetime64 arrays: a day that overflows its month
+    (Feb 29 in a common year, Apr 31) lands in the next month and is masked.
+    Only distinct valid dates are localized.
+
+    Args:
+        months, days, years: Date parts per row
+        minutes: Minutes since midnight per row
+        tz: Time zone of the wall-clock dates
+
+    Returns:
+        tuple: (object array of datetimes or None, float array of epochs, NaN if invalid)
+    """
+    in_range = (months >= 1) & (months <= 12) & (days >= 1) & (days <= 31)
+    first = (
+        (years - 1970).astype('datetime64[Y]').astype('datetime64[M]')
+        + (np.where(in_range, months, 1) - 1).astype('timedelta64[M]')
+    )
+    dates = first.astype('datetime64[D]') + (np.where(in_range, days, 1) - 1).astype('timedelta64[D]')
+    valid = in_range & (dates.astype('datetime64[M]') == first)
+
+    instants = np.full(len(months), None, dtype=object)
+    epochs = np.full(len(months), np.nan)
+    if valid.any():
+        # Identical (month, day, time, year) rows share one lookup
+        unique, inverse = np.unique(
+            np.column_stack([months[valid], days[valid], minutes[valid], years[valid]]),
+            axis=0, return_inverse=True,
+        )
+        resolved = [
+            local_instant(int(month), int(day), time(*divmod(int(minute), 60)), int(year), tz)
+            for month, day, minute, year in unique
+        ]
+        inverse = inverse.ravel()
+        instants[valid] = np.array(resolved, dtype=object)[inverse]
+        epochs[valid] = np.array([moment.timestamp() for moment in resolved])[inverse]
+    return instants, epochs
+
+
+def _minutes(times) -> np.ndarray:
+    return np.array([moment.hour * 60 + moment.minute for moment in times], dtype=np.int64)
+
+
+def seasonal_dates(entry_months, entry_days, open_times, exit_months, exit_days,
+                   close_times, entry_years, exit_years,
+                   tz: ZoneInfo) -> list[tuple[datetime, datetime] | None]:
+    """
+    Entry and exit instants for many signals and years at once.
+
+    Exit is moved to the next year when it precedes entry. Rows with a date
+    that does not exist in the given year get None.
+
+    Args:
+        entry_months, entry_days, open_times: Entry parts per row
+        exit_months, exit_days, close_times: Exit parts per row
+        entry_years, exit_years: Years to build the dates for, per row
+        tz: Time zone of the wall-clock dates
+
+    Returns:
+        list: (entry, exit) per row, None for invalid dates
+    """
+    entry_years = np.asarray(entry_years, dtype=np.int64)
+    exit_years = np.asarray(exit_years, dtype=np.int64)
+    entries, entry_epochs = _instants(
+        np.asarray(entry_months, dtype=np.int64), np.asarray(entry_days, dtype=np.int64),
+        _minutes(open_times), entry_years, tz,
+    )
+    exit_months = np.asarray(exit_months, dtype=np.int64)
+    exit_days = np.asarray(exit_days, dtype=np.int64)
+    close_minutes = _minutes(close_times)
+    exits, exit_epochs = _instants(exit_months, exit_days, close_minutes, exit_years, tz)
+
+    rolled = exit_epochs < entry_epochs
+    if rolled.any():
+        exits[rolled], _ = _instants(
+            exit_months[rolled], exit_days[rolled], close_minutes[rolled],
+            exit_years[rolled] + 1, tz,
+        )
+
+    return [
+        (entry_date, exit_date) if entry_date is not None and exit_date is not None else None
+        for entry_date, exit_date in zip(entries, exits)
+    ]
+
+
+def signal_dates(signals, entry_years, exit_years,
+                 tz: ZoneInfo) -> list[tuple[datetime, datetime] | None]:
+    """
+    seasonal_dates for SeasonalSignal instances
+
+    Args:
+        signals: Seasonal signals
+        entry_years, exit_years: Years to build the dates for, per signal
+        tz: Time zone of the wall-clock dates
+    """
+    return seasonal_dates(
+        [signal.entry_month for signal in signals],
+        [signal.entry_day for signal in signals],
+        [signal.open_time for signal in signals],
+        [signal.takeprofit_month for signal in signals],
+        [signal.takeprofit_day for signal in signals],
+        [signal.close_time for signal in signals],
+        entry_years, exit_years, tz,
+    )
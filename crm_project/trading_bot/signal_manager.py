@@ -3,16 +3,25 @@ Module for processing trading signals
 """
 
 import logging
+from collections import defaultdict
 from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
 from django.utils import timezone
 import pytz
 from crm_project.settings import TIME_ZONE
 from signals.models import SeasonalSignal
-from trading_bot.models import BotSeasonalSignal
-from datetime import datetime
+from trading_bot.models import BotSeasonalSignal, SignalSyncState
+from trading_bot.scheduler import mark_signals_dirty
+from trading_bot.seasonal_calendar import signal_dates
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT/UPDATE statement of the bulk sync
+BATCH_SIZE = 500
+
 
 class SignalManager:
     """
@@ -24,56 +33,78 @@ class SignalManager:
         self.local_tz = ZoneInfo(TIME_ZONE) 
         # Log timezone information during initialization
 
-    def check_signals(self):
+    def check_signals(self, full: bool = None):
         """
-        Check all signals, create new ones and update existing
+        Check changed signals, create new ones and update existing
         BotSeasonalSignal.
 
+        Only SeasonalSignal rows updated since the previous run are
+        re-materialized. A full reconcile of all signals runs every
+        SIGNAL_FULL_SYNC_INTERVAL seconds and at the turn of the year, when
+        signals get their rows for the new year.
+
+        Works on sets: all relevant BotSeasonalSignal rows are loaded in one
+        query, the differences are computed in memory and written with
+        bulk_create/bulk_update in one transaction, so the number of queries
+        does not grow with the number of signals.
+
+        Args:
+            full: Force (True) or suppress (False) the full reconcile,
+                by default it runs when due
+
         Returns:
             tuple: (int, int) - (number of created signals,
                                 number of updated)
         """
-        created_count = 0
-        updated_count = 0
-        current_year = timezone.now().year
         current_time = timezone.now()
-        logger.info("=" * 20 + f"Starting signal check. Current time: {current_time} " + "=" * 20)
-
-        # Get all seasonal signals
-        seasonal_signals = SeasonalSignal.objects.all()
-        logger.info(f"Found seasonal signals: {seasonal_signals.count()}")
+        state = SignalSyncState.get_state()
+        if full is None:
+            full = self._full_sync_due(state, current_time)
+        logger.info(
+            f"Starting {'full' if full else 'incremental'} signal check. "
+            f"Current time: {current_time}"
+        )
 
-        for signal in seasonal_signals:
-            try:
-                logger.info("-"*20)
-                logger.info(
-                    f"Processing signal: {signal} " f"(Magic: {signal.magic_number})"
-                )
+        if full:
+            seasonal_signals = list(SeasonalSignal.objects.all())
+            bot_signals = BotSeasonalSignal.objects.all()
+        else:
+            # Overlap covers edits committed after their updated_at and clock skew
+            since = state.last_synced_at - timedelta(seconds=settings.SIGNAL_SYNC_OVERLAP)
+            seasonal_signals = list(SeasonalSignal.objects.filter(updated_at__gte=since))
+            bot_signals = BotSeasonalSignal.objects.filter(
+                signal_id__in=[signal.pk for signal in seasonal_signals]
+            )
 
-                # Check existing signals
-                existing_signals = BotSeasonalSignal.objects.filter(
-                    signal=signal, entry_date__gt=current_time
-                )
+        to_create, to_update = [], []
+        if seasonal_signals:
+            to_create, to_update = self._plan_changes(seasonal_signals, bot_signals, current_time)
+            self._apply_changes(to_create, to_update, current_time)
 
-                if existing_signals.exists():
-                    # Update existing signals
-                    updated = self.update_bot_signals(signal)
-                    updated_count += updated
-                    logger.info(f"Updated {updated} signals for {signal}")
-                else:
-                    # Create new signal
-                    if self._process_signal(signal, current_year):
-                        created_count += 1
-                logger.info("-"*20)
-            except Exception as e:
-                logger.error(f"Error processing signal {signal}: {e}")
+        state.last_synced_at = current_time
+        if full:
+            state.last_full_sync_at = current_time
+        state.save(update_fields=['last_synced_at', 'last_full_sync_at'])
 
         logger.info(
-            f"Signal check completed. "
-            f"Created: {created_count}, Updated: {updated_count}"
+            f"Signal check completed for {len(seasonal_signals)} signals. "
+            f"Created: {len(to_create)}, Updated: {len(to_update)}"
         )
-        logger.info("=" * 20 + " Finished processing signals" + "=" * 20)
-        return created_count, updated_count
+        return len(to_create), len(to_update)
+
+    @staticmethod
+    def _full_sync_due(state: SignalSyncState, current_time: datetime) -> bool:
+        """
+        Returns:
+            bool: True if all signals have to be reconciled
+        """
+        if state.last_synced_at is None or state.last_full_sync_at is None:
+            return True
+        if state.last_full_sync_at.year != current_time.year:
+            return True
+        return (
+            current_time - state.last_full_sync_at
+        ).total_seconds() >= settings.SIGNAL_FULL_SYNC_INTERVAL
 
     def update_bot_signals(self, seasonal_signal: SeasonalSignal) -> int:
         """
@@ -85,164 +116,107 @@ class SignalManager:
         Returns:
             int: Number of updated signals
         """
-        updated_count = 0
         current_time = timezone.now()
-
-        logger.info(f"Starting BotSeasonalSignal update for {seasonal_signal}")
-
-        # Get all related BotSeasonalSignal
-        bot_signals = BotSeasonalSignal.objects.filter(
-            signal=seasonal_signal,
-            entry_date__gt=current_time,  # Only future signals
-        )
-
-        for bot_signal in bot_signals:
-            try:
-                # Create new dates in fixed timezone UTC+1
-                entry_date = datetime(
-                    year=bot_signal.entry_date.year,
-                    month=seasonal_signal.entry_month,
-                    day=seasonal_signal.entry_day,
-                    hour=seasonal_signal.open_time.hour,
-                    minute=seasonal_signal.open_time.minute,
-                    tzinfo=self.local_tz
-                )
-
-                exit_date = datetime(
-                    year=bot_signal.exit_date.year,
-                    month=seasonal_signal.takeprofit_month,
-                    day=seasonal_signal.takeprofit_day,
-                    hour=seasonal_signal.close_time.hour,
-                    minute=seasonal_signal.close_time.minute,
-                    tzinfo=self.local_tz
-                )
-
-                # Check if exit date needs to be moved to next year
-                if exit_date < entry_date:
-                    exit_date = datetime(
-                        year=bot_signal.exit_date.year + 1,
-                        month=seasonal_signal.takeprofit_month,
-                        day=seasonal_signal.takeprofit_day,
-                        hour=seasonal_signal.close_time.hour,
-                        minute=seasonal_signal.close_time.minute,
-                        tzinfo=self.local_tz
-                    )
-
-                # Update dates only if they changed
-                if (
-                    bot_signal.entry_date != entry_date
-                    or bot_signal.exit_date != exit_date
-                ):
-                    bot_signal.entry_date = entry_date
-                    bot_signal.exit_date = exit_date
-                    bot_signal.save()
-
-                    logger.info(f"Updated BotSeasonalSignal {bot_signal}:")
-                    logger.info(f"New entry date (UTC+1): {entry_date}")
-                    logger.info(f"New exit date (UTC+1): {exit_date}")
-                    updated_count += 1
-
-            except Exception as e:
-                logger.error(f"Error updating BotSeasonalSignal {bot_signal}: {e}")
-
-        logger.info(
-            f"BotSeasonalSignal update completed. "
-            f"Updated signals: {updated_count}"
+        _, to_update = self._plan_changes(
+            [seasonal_signal], seasonal_signal.bot_signals.all(), current_time, create=False
         )
-        return updated_count
+        self._apply_changes([], to_update, current_time)
+        logger.info(f"Updated {len(to_update)} BotSeasonalSignal for {seasonal_signal}")
+        return len(to_update)
 
-    def _process_signal(self, signal: SeasonalSignal, current_year: int) -> bool:
+    def _plan_changes(self, seasonal_signals: list[SeasonalSignal], bot_signals: QuerySet,
+                      current_time: datetime, create: bool = True) -> tuple[list[BotSeasonalSignal], list[BotSeasonalSignal]]:
         """
-        Process individual signal
+        Computes BotSeasonalSignal rows to create and to update in memory.
+
+        Future rows get their dates recomputed from the seasonal signal. A
+        signal without future rows gets a row for the current year if none
+        was created this year and its entry is still ahead.
 
         Args:
-            signal: Seasonal signal to process
-            current_year: Current year
+            seasonal_signals: Signals to check
+            bot_signals: BotSeasonalSignal rows of these signals
+            current_time: Current time
+            create: Whether missing rows should be planned
 
         Returns:
-            bool: True if new signal was created, False otherwise
+            tuple: (rows to create, changed rows to update)
         """
-        # Check if BotSeasonalSignal exists for current year and magic_number
-        existing_bot_signal = BotSeasonalSignal.objects.filter(
-            signal=signal,
-            signal__magic_number=signal.magic_number,  # Add filter by magic_number
-            created_at__year=current_year,
-        ).exists()
-
-        if existing_bot_signal:
-            logger.info(
-                f"Signal {signal} (Magic: {signal.magic_number}) already exists for year {current_year}"
-            )
-            return False
-
-        # Get current time (UTC)
-        current_time = datetime.now(self.local_tz)
-        
-        # Create entry date in fixed timezone UTC+1
-        entry_date = datetime(
-            year=current_year,
-            month=signal.entry_month,
-            day=signal.entry_day,
-            hour=signal.open_time.hour,
-            minute=signal.open_time.minute,
-            tzinfo=self.local_tz
+        current_year = current_time.year
+
+        future_rows = defaultdict(list)
+        created_this_year = set()
+        rows = bot_signals.filter(
+            Q(entry_date__gt=current_time) | Q(created_at__year=current_year)
+        ).only('id', 'signal_id', 'entry_date', 'exit_date', 'created_at')
+        for row in rows:
+            if row.entry_date > current_time:
+                future_rows[row.signal_id].append(row)
+            if timezone.localtime(row.created_at).year == current_year:
+                created_this_year.add(row.signal_id)
+
+        updates = [
+            (signal, row) for signal in seasonal_signals for row in future_rows.get(signal.pk, ())
+        ]
+        candidates = [
+            signal for signal in seasonal_signals
+            if create and signal.pk not in future_rows and signal.pk not in created_this_year
+        ]
+        update_dates = signal_dates(
+            [signal for signal, _ in updates],
+            [row.entry_date.year for _, row in updates],
+            [row.exit_date.year for _, row in updates],
+            self.local_tz,
+        )
+        create_dates = signal_dates(
+            candidates, [current_year] * len(candidates), [current_year] * len(candidates),
+            self.local_tz,
         )
 
-        # Convert time to UTC for proper comparison
-        logger.info(f"Entry (UTC): {entry_date} | Current time: {current_time}")
-        # Compare dates in same timezone (UTC)
-        if entry_date > current_time:
-            self._create_bot_signal(signal, current_year)
-            return True
+        to_create, to_update, invalid = [], [], set()
+        for (signal, row), dates in zip(updates, update_dates):
+            if dates is None:
+                invalid.add(signal.pk)
+            elif row.entry_date != dates[0] or row.exit_date != dates[1]:
+                row.entry_date, row.exit_date = dates
+                to_update.append(row)
+        for signal, dates in zip(candidates, create_dates):
+            if dates is None:
+                invalid.add(signal.pk)
+            elif dates[0] > current_time:
+                to_create.append(BotSeasonalSignal(
+                    signal=signal, entry_date=dates[0], exit_date=dates[1]
+                ))
+
+        if invalid:
+            logger.warning(
+                "Skipped %d signals with dates that do not exist in the year, first ids: %s",
+                len(invalid), sorted(invalid)[:20],
+            )
+        return to_create, to_update
 
-    def _create_bot_signal(self, signal: SeasonalSignal, current_year: int):
+    def _apply_changes(self, to_create: list[BotSeasonalSignal],
+                       to_update: list[BotSeasonalSignal], current_time: datetime) -> None:
         """
-        Create trading signal
-
-        Args:
-            signal: Seasonal signal on which BotSeasonalSignal is based
-            current_year: Current year
+        Writes planned rows in one transaction and reschedules them in the bot
         """
-        # Create entry and exit dates in fixed timezone UTC+1
-        entry_date = datetime(
-            year=current_year,
-            month=signal.entry_month,
-            day=signal.entry_day,
-            hour=signal.open_time.hour,
-            minute=signal.open_time.minute,
-            tzinfo=self.local_tz
-        )
-
-        exit_date = datetime(
-            year=current_year,
-            month=signal.takeprofit_month,
-            day=signal.takeprofit_day,
-            hour=signal.close_time.hour,
-            minute=signal.close_time.minute,
-            tzinfo=self.local_tz
-        )
-
-        # If exit date is less than entry date, exit is in next year
-        if exit_date < entry_date:
-            exit_date = datetime(
-                year=current_year + 1,
-                month=signal.takeprofit_month,
-                day=signal.takeprofit_day,
-                hour=signal.close_time.hour,
-                minute=signal.close_time.minute,
-                tzinfo=self.local_tz
-            )  
-            logger.info(f"Exit date moved to next year: {exit_date}")
-
-        bot_signal = BotSeasonalSignal.objects.create(
-            signal=signal, entry_date=entry_date, exit_date=exit_date
-        )
-        logger.info("-"*20)
-        logger.info(f"Created trading signal {bot_signal}:")
-        logger.info(f"Entry (UTC+1): {entry_date}")
-        logger.info(f"Exit (UTC+1): {exit_date}")
-        logger.info(f"Magic: {signal.magic_number}")
-        logger.info("-"*20)
+        if not to_create and not to_update:
+            return
+        with transaction.atomic():
+            BotSeasonalSignal.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+            for row in to_update:
+                # bulk_update does not apply auto_now
+                row.updated_at = current_time
+            BotSeasonalSignal.objects.bulk_update(
+                to_update, ['entry_date', 'exit_date', 'updated_at'], batch_size=BATCH_SIZE
+            )
+        # Bulk operations do not send post_save
+        mark_signals_dirty(row.pk for row in to_create + to_update if row.pk)
+        for row in to_create:
+            logger.debug(
+                "Created trading signal for %s: entry %s, exit %s",
+                row.signal, row.entry_date, row.exit_date,
+            )
 
     def create_date_with_fixed_timezone(self, year, month, day, hour, minute, 
                                         fixed_timezone='Etc/GMT-1'):
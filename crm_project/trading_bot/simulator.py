@@ -0,0 +1,427 @@
+"""
+In-process IB Gateway simulator for offline runs and benchmarks
+"""
+
+import asyncio
+import dataclasses
+import itertools
+import logging
+import random
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from eventkit import Event
+from ib_insync import (
+    AccountValue,
+    BarData,
+    Contract,
+    ContractDetails,
+    Future,
+    Order,
+    OrderStatus,
+    Position,
+    Ticker,
+    Trade,
+    TradeLogEntry,
+    util,
+)
+
+logger = logging.getLogger("bot")
+
+ACCOUNT = "DU0000000"
+
+
+@dataclasses.dataclass
+class SimulatorConfig:
+    """
+    Behaviour of the simulated gateway.
+
+    Latencies are in seconds and are drawn uniformly from (low, high).
+    Failure rates are probabilities per request class: "contract_details",
+    "historical_data", "tickers", "account_summary", "place_order" (the
+    order is rejected by the gateway).
+    """
+    request_latency: tuple[float, float] = (0.0, 0.0)
+    confirm_latency: tuple[float, float] = (0.0, 0.0)
+    fill_latency: tuple[float, float] = (0.0, 0.0)
+    failure_rates: dict = dataclasses.field(default_factory=dict)
+    # Fill market orders, fill limit orders immediately, price of unknown symbols
+    fill_market_orders: bool = True
+    fill_limit_orders: bool = False
+    default_price: float = 100.0
+    net_liquidation: float = 100000.0
+    # Gateway clock minus local clock, seconds
+    clock_offset: float = 0.0
+    # Instruments are created for any requested symbol
+    auto_instruments: bool = True
+    seed: int | None = None
+
+
+@dataclasses.dataclass
+class Instrument:
+    details: ContractDetails
+    price: float
+
+
+class _FakeClient:
+    """Request id source of the simulated connection"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+
+    def getReqId(self) -> int:
+        return next(self._ids)
+
+
+class FakeIB:
+    """
+    Implements the part of the ib_insync.IB interface used by the bot.
+
+    Requests take the configured latency on the asyncio loop, so ticks,
+    confirmations and fills interleave the same way as with a gateway.
+    Orders are acknowledged (permId assigned) after confirm_latency and
+    filled after fill_latency; stop orders fill when set_price crosses
+    their stop price.
+
+    Example:
+        ib = FakeIB(SimulatorConfig(request_latency=(0.01, 0.05)))
+        ib.add_instrument("ES", "CME", price=5000, multiplier=50)
+        BotSignalManager(ib).manage_signals()
+    """
+
+    def __init__(self, config: SimulatorConfig = None):
+        self.config = config or SimulatorConfig()
+        self.client = _FakeClient()
+        self._random = random.Random(self.config.seed)
+        self._connected = False
+        self._instruments: dict[tuple[str, str], Instrument] = {}
+        self._by_con_id: dict[int, Instrument] = {}
+        self._con_ids = itertools.count(100000)
+        self._perm_ids = itertools.count(1000000)
+        self._trades: dict[int, Trade] = {}
+        self._positions: dict[int, Position] = {}
+        self._account: dict[str, AccountValue] = {}
+        self.request_counts: dict[str, int] = {}
+
+        self.connectedEvent = Event('connectedEvent')
+        self.disconnectedEvent = Event('disconnectedEvent')
+        self.errorEvent = Event('errorEvent')
+        self.openOrderEvent = Event('openOrderEvent')
+        self.orderStatusEvent = Event('orderStatusEvent')
+        self.execDetailsEvent = Event('execDetailsEvent')
+        self.positionEvent = Event('positionEvent')
+        self.accountValueEvent = Event('accountValueEvent')
+        self.accountSummaryEvent = Event('accountSummaryEvent')
+
+        self.set_account_value('NetLiquidation', self.config.net_liquidation)
+
+    # Connection
+
+    def connect(self, host: str = '127.0.0.1', port: int = 4002, clientId: int = 1, **kwargs):
+        self._connected = True
+        self.connectedEvent.emit()
+        return self
+
+    def disconnect(self) -> None:
+        if self._connected:
+            self._connected = False
+            self.disconnectedEvent.emit()
+
+    def isConnected(self) -> bool:
+        return self._connected
+
+    def simulate_disconnect(self) -> None:
+        """
+        Drop the session as the gateway would on a restart
+        """
+        self.disconnect()
+
+    # Event loop
+
+    def run(self, *awaitables):
+        return util.run(*awaitables)
+
+    def sleep(self, *args) -> bool:
+        return util.sleep(*args)
+
+    # Market data and contracts
+
+    def add_instrument(self, symbol: str, exchange: str, price: float = None,
+                       multiplier: float = 1, time_zone_id: str = 'UTC',
+                       trading_hours: str = None) -> ContractDetails:
+        """
+        Register a front-month future; by default it trades around the clock
+
+        Returns:
+            ContractDetails: Details returned by reqContractDetails
+        """
+        expiry = date.today() + timedelta(days=60)
+        contract = Future(
+            conId=next(self._con_ids),
+            symbol=symbol,
+            lastTradeDateOrContractMonth=expiry.strftime('%Y%m%d'),
+            exchange=exchange,
+            currency='USD',
+            multiplier=str(multiplier),
+            localSymbol=f"{symbol}{expiry:%y%m}",
+        )
+        details = ContractDetails(
+            contract=contract,
+            tradingHours=trading_hours or self._open_hours(),
+            liquidHours=trading_hours or self._open_hours(),
+            timeZoneId=time_zone_id,
+        )
+        instrument = Instrument(details, self.config.default_price if price is None else price)
+        self._instruments[(symbol, exchange)] = instrument
+        self._by_con_id[contract.conId] = instrument
+        return details
+
+    def set_price(self, symbol: str, exchange: str, price: float) -> None:
+        """
+        Move the market price and trigger stop orders it crosses
+        """
+        instrument = self._instrument(symbol, exchange)
+        instrument.price = price
+        con_id = instrument.details.contract.conId
+        for trade in list(self._trades.values()):
+            order = trade.order
+            if (trade.contract.conId != con_id or trade.isDone()
+                    or order.orderType != 'STP' or not order.permId):
+                continue
+            if (order.action == 'SELL' and price <= order.auxPrice) or (
+                    order.action == 'BUY' and price >= order.auxPrice):
+                self._fill(trade, price)
+
+    def reqContractDetails(self, contract: Contract) -> list[ContractDetails]:
+        return self.run(self.reqContractDetailsAsync(contract))
+
+    async def reqContractDetailsAsync(self, contract: Contract) -> list[ContractDetails]:
+        if not await self._request('contract_details'):
+            return []
+        instrument = self._instrument(contract.symbol, contract.exchange)
+        return [instrument.details] if instrument else []
+
+    def reqHistoricalData(self, contract: Contract, *args, **kwargs) -> list[BarData]:
+        return self.run(self.reqHistoricalDataAsync(contract, *args, **kwargs))
+
+    async def reqHistoricalDataAsync(self, contract: Contract, *args, **kwargs) -> list[BarData]:
+        if not await self._request('historical_data'):
+            return []
+        price = self._price(contract)
+        now = datetime.now(dt_timezone.utc).replace(second=0, microsecond=0)
+        bars = []
+        for minute in range(30, 0, -1):
+            close = round(price * (1 + self._random.uniform(-0.001, 0.001)), 2)
+            bars.append(BarData(
+                date=now - timedelta(minutes=minute),
+                open=close, high=close, low=close, close=close, volume=1,
+            ))
+        bars[-1].close = price
+        return bars
+
+    async def reqTickersAsync(self, *contracts: Contract, **kwargs) -> list[Ticker]:
+        if not await self._request('tickers'):
+            return [Ticker(contract=contract) for contract in contracts]
+        tickers = []
+        for contract in contracts:
+            price = self._price(contract)
+            tickers.append(Ticker(
+                contract=contract,
+                time=datetime.now(dt_timezone.utc),
+                bid=price, ask=price, last=price, close=price,
+                bidSize=1, askSize=1, lastSize=1,
+            ))
+        return tickers
+
+    def reqCurrentTime(self) -> datetime:
+        return self.run(self.reqCurrentTimeAsync())
+
+    async def reqCurrentTimeAsync(self) -> datetime:
+        await self._request('current_time')
+        now = datetime.now(dt_timezone.utc) + timedelta(seconds=self.config.clock_offset)
+        # The gateway reports whole seconds
+        return now.replace(microsecond=0)
+
+    # Account
+
+    def set_account_value(self, tag: str, value: float, currency: str = 'USD') -> None:
+        """
+        Update an account value and stream it to subscribers
+        """
+        account_value = AccountValue(ACCOUNT, tag, str(value), currency, '')
+        self._account[tag] = account_value
+        self.accountValueEvent.emit(account_value)
+
+    def accountValues(self, account: str = '') -> list[AccountValue]:
+        return list(self._account.values())
+
+    def accountSummary(self, account: str = '') -> list[AccountValue]:
+        return self.run(self.accountSummaryAsync(account))
+
+    async def accountSummaryAsync(self, account: str = '') -> list[AccountValue]:
+        if not await self._request('account_summary'):
+            return []
+        values = list(self._account.values())
+        for value in values:
+            self.accountSummaryEvent.emit(value)
+        return values
+
+    def positions(self, account: str = '') -> list[Position]:
+        return list(self._positions.values())
+
+    # Orders
+
+    def trades(self) -> list[Trade]:
+        return list(self._trades.values())
+
+    def openTrades(self) -> list[Trade]:
+        return [trade for trade in self._trades.values() if not trade.isDone()]
+
+    def orders(self) -> list[Order]:
+        return [trade.order for trade in self._trades.values()]
+
+    def openOrders(self) -> list[Order]:
+        return [trade.order for trade in self.openTrades()]
+
+    def reqAllOpenOrders(self) -> list[Order]:
+        return self.run(self.reqAllOpenOrdersAsync())
+
+    async def reqAllOpenOrdersAsync(self) -> list[Order]:
+        await self._request('open_orders')
+        return self.openOrders()
+
+    def placeOrder(self, contract: Contract, order: Order) -> Trade:
+        """
+        Accepts the order at once; acknowledgement and fills follow on the loop
+        """
+        self._count('place_order')
+        if not order.orderId:
+            order.orderId = self.client.getReqId()
+        trade = self._trades.get(order.orderId)
+        if trade is not None:
+            # Modification of a live order
+            trade.order = order
+            return trade
+
+        trade = Trade(
+            contract=contract,
+            order=order,
+            orderStatus=OrderStatus(
+                orderId=order.orderId,
+                status=OrderStatus.PendingSubmit,
+                remaining=order.totalQuantity,
+                parentId=order.parentId,
+            ),
+            fills=[],
+            log=[TradeLogEntry(datetime.now(dt_timezone.utc), OrderStatus.PendingSubmit, '')],
+        )
+        self._trades[order.orderId] = trade
+        rejected = self._fails('place_order')
+        self._later(self.config.confirm_latency, self._acknowledge, trade, rejected)
+        return trade
+
+    def cancelOrder(self, order: Order) -> Trade | None:
+        trade = self._trades.get(order.orderId)
+        if trade is None or trade.isDone():
+            return trade
+        self._later(self.config.request_latency, self._set_status, trade, OrderStatus.Cancelled)
+        return trade
+
+    # Simulation internals
+
+    def _acknowledge(self, trade: Trade, rejected: bool) -> None:
+        if rejected:
+            self._set_status(trade, OrderStatus.Cancelled, 'Order rejected by simulator')
+            return
+        trade.order.permId = next(self._perm_ids)
+        trade.orderStatus.permId = trade.order.permId
+        self.openOrderEvent.emit(trade)
+        self._set_status(trade, OrderStatus.Submitted)
+
+        order_type = trade.order.orderType
+        if (order_type == 'MKT' and self.config.fill_market_orders) or (
+                order_type == 'LMT' and self.config.fill_limit_orders):
+            price = trade.order.lmtPrice if order_type == 'LMT' else self._price(trade.contract)
+            self._later(self.config.fill_latency, self._fill, trade, price)
+
+    def _fill(self, trade: Trade, price: float) -> None:
+        if trade.isDone():
+            return
+        order = trade.order
+        status = trade.orderStatus
+        status.filled = order.totalQuantity
+        status.remaining = 0
+        status.avgFillPrice = status.lastFillPrice = price
+
+        contract = trade.contract
+        signed = order.totalQuantity if order.action == 'BUY' else -order.totalQuantity
+        current = self._positions.get(contract.conId)
+        quantity = (current.position if current else 0) + signed
+        position = Position(ACCOUNT, contract, quantity, price)
+        if quantity:
+            self._positions[contract.conId] = position
+        else:
+            self._positions.pop(contract.conId, None)
+        self.positionEvent.emit(position)
+        self._set_status(trade, OrderStatus.Filled)
+
+    def _set_status(self, trade: Trade, status: str, message: str = '') -> None:
+        if trade.isDone():
+            return
+        trade.orderStatus.status = status
+        trade.log.append(TradeLogEntry(datetime.now(dt_timezone.utc), status, message))
+        self.orderStatusEvent.emit(trade)
+        trade.statusEvent.emit(trade)
+        if status == OrderStatus.Filled:
+            trade.filledEvent.emit(trade)
+        elif status == OrderStatus.Cancelled:
+            trade.cancelledEvent.emit(trade)
+
+    def _later(self, latency: tuple[float, float], callback, *args) -> None:
+        delay = self._random.uniform(*latency)
+        loop = util.getLoop()
+        if delay <= 0:
+            loop.call_soon(callback, *args)
+        else:
+            loop.call_later(delay, callback, *args)
+
+    async def _request(self, kind: str) -> bool:
+        """
+        Wait for the request latency
+
+        Returns:
+            bool: False if the request is failed by failure injection
+        """
+        self._count(kind)
+        delay = self._random.uniform(*self.config.request_latency)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self._fails(kind):
+            self.errorEvent.emit(-1, 162, f"Simulated {kind} failure", None)
+            return False
+        return True
+
+    def _fails(self, kind: str) -> bool:
+        rate = self.config.failure_rates.get(kind, 0)
+        return rate > 0 and self._random.random() < rate
+
+    def _count(self, kind: str) -> None:
+        self.request_counts[kind] = self.request_counts.get(kind, 0) + 1
+
+    def _instrument(self, symbol: str, exchange: str) -> Instrument | None:
+        instrument = self._instruments.get((symbol, exchange))
+        if instrument is None and self.config.auto_instruments:
+            self.add_instrument(symbol, exchange)
+            instrument = self._instruments[(symbol, exchange)]
+        return instrument
+
+    def _price(self, contract: Contract) -> float:
+        instrument = self._by_con_id.get(contract.conId)
+        return self.config.default_price if instrument is None else instrument.price
+
+    @staticmethod
+    def _open_hours() -> str:
+        today = date.today()
+        days = [today + timedelta(days=offset) for offset in range(-1, 8)]
+        return ';'.join(
+            f"{day:%Y%m%d}:0000-{day + timedelta(days=1):%Y%m%d}:0000" for day in days
+        )
@@ -0,0 +1,190 @@
+"""
+Structured, non-blocking logging for the trading bot
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+from trading_bot.redis_client import get_redis, report_failure
+
+# Loggers switched to DEBUG when verbose tracing is enabled
+TRACED_LOGGERS = ('trading_bot', 'trading_bot.core.bot_signal_manager', 'bot')
+# How long the tracing flag read from Redis is trusted, seconds
+TRACE_FLAG_TTL = 5
+
+# Argument types that can be formatted later in the listener thread
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None))
+
+_context: contextvars.ContextVar[dict] = contextvars.ContextVar('log_context', default={})
+
+
+@contextlib.contextmanager
+def log_context(**fields):
+    """
+    Attach fields (signal id, symbol, ...) to every record logged inside
+    the block, including records of tasks started from it
+
+    Example:
+        with log_context(signal=signal.pk, symbol="ES"):
+            logger.info("Entry time reached")
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Copies the current log context into the record.
+
+    Must run in the thread that logs, i.e. on the queue handler, not on the
+    handlers served by the listener thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        fields = _context.get()
+        record.fields = fields
+        record.context = ''.join(f' {key}={value}' for key, value in fields.items())
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record with the context fields as keys
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **getattr(record, 'fields', {}),
+        }
+        if record.exc_info:
+            event['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(event, default=str)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Puts records on an in-memory queue served by a listener thread, so that
+    the bot never blocks on the stream.
+
+    Records are dropped when the queue is full. The listener is restarted
+    in forked children (celery prefork workers).
+    """
+
+    def __init__(self, handlers, queue_size: int = 10000, respect_handler_level: bool = True):
+        """
+        Args:
+            handlers: Handlers served by the listener thread
+            queue_size: Maximum number of pending records
+            respect_handler_level: Let each handler apply its own level
+        """
+        super().__init__(queue.Queue(queue_size))
+        self.target_handlers = [handlers[index] for index in range(len(handlers))]
+        self.respect_handler_level = respect_handler_level
+        self.dropped = 0
+        self.listener = None
+        self._start()
+        atexit.register(self._stop)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart)
+
+    def _start(self) -> None:
+        self.listener = QueueListener(
+            self.queue, *self.target_handlers,
+            respect_handler_level=self.respect_handler_level,
+        )
+        self.listener.start()
+
+    def _stop(self) -> None:
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+    def _restart(self) -> None:
+        # The listener thread does not survive fork
+        self.queue = queue.Queue(self.queue.maxsize)
+        self._start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Keeps formatting out of the logging thread when the arguments are
+        immutable; other arguments are rendered now, before they change
+        """
+        if record.args and not all(
+            isinstance(arg, _IMMUTABLE_ARGS) for arg in record.args
+        ):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_trace_checked_at = None
+_trace_enabled = False
+
+
+def set_tracing(enabled: bool) -> None:
+    """
+    Switch verbose per-step tracing for all bot processes
+
+    Args:
+        enabled: True to log at DEBUG level
+    """
+    client = get_redis()
+    if enabled:
+        client.set(settings.BOT_LOG_TRACE_KEY, 1)
+    else:
+        client.delete(settings.BOT_LOG_TRACE_KEY)
+    _apply_tracing(enabled)
+
+
+def refresh_tracing() -> bool:
+    """
+    Apply the tracing flag stored in Redis; called once per tick and read
+    at most every TRACE_FLAG_TTL seconds
+
+    Returns:
+        bool: True if tracing is enabled
+    """
+    global _trace_checked_at
+    now = time.monotonic()
+    if _trace_checked_at is not None and now - _trace_checked_at < TRACE_FLAG_TTL:
+        return _trace_enabled
+    _trace_checked_at = now
+    try:
+        enabled = settings.BOT_LOG_TRACE or bool(get_redis().exists(settings.BOT_LOG_TRACE_KEY))
+    except Exception as e:
+        report_failure(e)
+        return _trace_enabled
+    _apply_tracing(enabled)
+    return enabled
+
+
+def _apply_tracing(enabled: bool) -> None:
+    global _trace_enabled
+    if enabled == _trace_enabled:
+        return
+    _trace_enabled = enabled
+    level = logging.DEBUG if enabled else logging.INFO
+    for name in TRACED_LOGGERS:
+        logging.getLogger(name).setLevel(level)
+    logging.getLogger('bot').info("Verbose tracing %s", "enabled" if enabled else "disabled")
@@ -5,6 +5,7 @@
 import logging
 from celery import shared_task
 from django.apps import apps
+from django.conf import settings
 from django.core.exceptions import AppRegistryNotReady
 
 logger = logging.getLogger('trading_bot')
@@ -29,7 +30,7 @@ def check_signals():
         return "Waiting for Django apps to be ready..."
 
 
-@shared_task(queue='bot_queue', unique_on=['manage_bot'])
+@shared_task(queue='bot_queue')
 def manage_bot():
     """Task for managing the trading bot"""
     logger.info("Starting manage_bot task")
@@ -39,15 +40,26 @@ def manage_bot():
         
         # Проверяем состояние бота
         from trading_bot.models import BotState
-        bot_state = BotState.get_state()
-        
-        if not bot_state.is_running:
+        if not BotState.cached_state()['is_running']:
             logger.info("Bot is stopped, skipping execution")
             return "Bot is stopped"
-            
+
+        if settings.BOT_DAEMON_ENABLED:
+            # The resident daemon owns the IB session, only wake it up
+            from trading_bot.daemon import wake_daemon
+            if not wake_daemon():
+                logger.warning("Bot daemon heartbeat not found, is it running?")
+            return "Bot daemon signalled"
+
+        from trading_bot import metrics
         from trading_bot.bot import bot
-        logger.info("Bot is running")
-        return bot.run()
+        from trading_bot.tick_lock import tick_lease
+        with tick_lease() as lease:
+            if lease is None:
+                metrics.registry.publish()
+                return "Previous tick is still running"
+            logger.info("Bot is running")
+            return bot.run()
     except AppRegistryNotReady:
         logger.warning("Django apps are not ready, retrying in 5 seconds")
         # manage_bot.apply_async(countdown=5)
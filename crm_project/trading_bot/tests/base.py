@@ -0,0 +1,65 @@
+"""
+Fixtures for simulator-driven bot tests
+"""
+
+import logging
+from datetime import time as dt_time, timedelta
+
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from signals.models import SeasonalSignal, Symbol
+from trading_bot import redis_client
+from trading_bot.bot_state_cache import bot_state_cache
+from trading_bot.contract_cache import contract_cache
+from trading_bot.models import BotSeasonalSignal, BotState
+from trading_bot.simulator import FakeIB, SimulatorConfig
+
+
+class SimulatorTestCase(TransactionTestCase):
+    """
+    Runs the bot against FakeIB without Redis; every test gets a fresh
+    gateway and empty process caches. Tests are not wrapped in a
+    transaction because the async manager saves from a worker thread.
+    """
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        redis_client.disable()
+        contract_cache.clear()
+        bot_state_cache.clear()
+        BotState.objects.create(is_running=True)
+        self.symbol = Symbol.objects.create(
+            financial_instrument='ES', company_name='E-mini S&P 500', exchange='CME'
+        )
+
+    def make_ib(self, **config) -> FakeIB:
+        ib = FakeIB(SimulatorConfig(seed=1, **config))
+        ib.connect()
+        ib.add_instrument('ES', 'CME', price=5000, multiplier=50)
+        return ib
+
+    def make_signal(self, entry_in: float, exit_in: float = 24 * 60 * 60, **fields) -> BotSeasonalSignal:
+        """
+        Bot signal entering and exiting the given number of seconds from now
+        """
+        now = timezone.now()
+        signal = SeasonalSignal.objects.create(
+            magic_number=SeasonalSignal.objects.count() + 1,
+            symbol=self.symbol,
+            stoploss=10,
+            risk=1,
+            entry_month=now.month,
+            entry_day=now.day,
+            takeprofit_month=now.month,
+            takeprofit_day=now.day,
+            open_time=dt_time(0),
+            close_time=dt_time(23, 30),
+        )
+        return BotSeasonalSignal.objects.create(
+            signal=signal,
+            entry_date=now + timedelta(seconds=entry_in),
+            exit_date=now + timedelta(seconds=exit_in),
+            **fields,
+        )
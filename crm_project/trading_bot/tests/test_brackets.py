@@ -0,0 +1,47 @@
+"""
+Bracket placement when a leg cannot be placed
+"""
+
+from unittest import mock
+
+from trading_bot.bot_signal_manager import BotSignalManager
+from trading_bot.request_scheduler import PacedGateway
+from trading_bot.tests.base import SimulatorTestCase
+
+
+class BracketPlacementTest(SimulatorTestCase):
+
+    def test_parent_is_cancelled_when_stop_fails(self):
+        ib = self.make_ib()
+        signal = self.make_signal(entry_in=-1)
+        place = PacedGateway.placeOrderAsync
+
+        async def place_without_stops(gateway, contract, order):
+            if order.orderType == 'STP':
+                raise ConnectionError("Simulated stop placement failure")
+            return await place(gateway, contract, order)
+
+        manager = BotSignalManager(ib)
+        with mock.patch.object(PacedGateway, 'placeOrderAsync', place_without_stops):
+            manager.manage_signals()
+
+        [parent] = ib.trades()
+        self.assertEqual(parent.order.orderType, 'LMT')
+        self.assertEqual(parent.orderStatus.status, 'Cancelled')
+        signal.refresh_from_db()
+        self.assertIsNone(signal.order_id)
+        self.assertIsNone(signal.stop_order_id)
+        self.assertIn(signal.pk, manager.retries)
+
+    def test_bracket_is_saved_when_both_legs_are_placed(self):
+        ib = self.make_ib()
+        signal = self.make_signal(entry_in=-1)
+
+        BotSignalManager(ib).manage_signals()
+
+        signal.refresh_from_db()
+        self.assertEqual(
+            {trade.order.orderType for trade in ib.trades()}, {'LMT', 'STP'}
+        )
+        self.assertIsNotNone(signal.order_id)
+        self.assertIsNotNone(signal.stop_order_id)
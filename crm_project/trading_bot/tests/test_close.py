@@ -0,0 +1,51 @@
+"""
+Results reported for exits of the async signal manager
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from trading_bot.async_signal_manager import AsyncBotSignalManager
+from trading_bot.bot_signal_manager import BotSignalManager
+from trading_bot.models import TradeStatus
+from trading_bot.tests.base import SimulatorTestCase
+
+
+class CloseResultTest(SimulatorTestCase):
+
+    def open_position(self, ib):
+        signal = self.make_signal(entry_in=-1)
+        BotSignalManager(ib).manage_signals()
+        signal.refresh_from_db()
+        self.assertIsNotNone(signal.stop_order_id)
+        signal.exit_date = timezone.now() - timedelta(seconds=1)
+        signal.save()
+        return signal
+
+    def close(self, ib):
+        manager = AsyncBotSignalManager(ib)
+        return ib.run(manager.manage_signals_async())
+
+    def test_filled_close_is_reported_ok(self):
+        ib = self.make_ib(fill_limit_orders=True)
+        signal = self.open_position(ib)
+
+        [result] = self.close(ib)
+
+        self.assertEqual((result.signal_id, result.action, result.ok), (signal.pk, "close", True))
+        self.assertIsNone(result.error)
+        signal.refresh_from_db()
+        self.assertEqual(signal.status, TradeStatus.CLOSE)
+
+    def test_unfilled_close_is_reported_failed(self):
+        ib = self.make_ib(fill_limit_orders=True)
+        signal = self.open_position(ib)
+        ib.config.fill_market_orders = False
+
+        with mock.patch('trading_bot.bot_signal_manager.CLOSE_FILL_TIMEOUT', 0.1):
+            [result] = self.close(ib)
+
+        self.assertEqual((result.signal_id, result.action, result.ok), (signal.pk, "close", False))
+        self.assertTrue(result.error)
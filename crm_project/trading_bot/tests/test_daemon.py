@@ -0,0 +1,52 @@
+"""
+Deadline wake-ups of the resident bot
+"""
+
+from unittest import mock
+
+from django.conf import settings
+
+from trading_bot.daemon import BotDaemon
+from trading_bot.scheduler import RETRY
+from trading_bot.tests.base import SimulatorTestCase
+
+
+class DaemonDeadlineTest(SimulatorTestCase):
+
+    def make_daemon(self, ib) -> BotDaemon:
+        daemon = BotDaemon(tick_interval=10)
+        daemon.ib = ib
+        ib.disconnectedEvent += daemon._on_disconnected
+        daemon.connected = True
+        return daemon
+
+    def test_entry_placed_at_deadline_when_gateway_clock_is_behind(self):
+        # The gateway runs behind the local clock: waking by the local clock
+        # ticks before the entry is due by the gateway clock
+        ib = self.make_ib(clock_offset=-0.9)
+        daemon = self.make_daemon(ib)
+        signal = self.make_signal(entry_in=2)
+
+        daemon._tick()
+        daemon._schedule_next()
+        daemon._tick()
+
+        signal.refresh_from_db()
+        self.assertIsNotNone(signal.order_id)
+
+    def test_failed_entry_is_retried_before_the_sweep(self):
+        ib = self.make_ib(failure_rates={'place_order': 1.0})
+        daemon = self.make_daemon(ib)
+        signal = self.make_signal(entry_in=-1)
+
+        daemon._tick()
+        with mock.patch.object(daemon, '_wait_for_wakeup'):
+            daemon._schedule_next()
+
+        self.assertIn(RETRY, daemon.scheduler._events[signal.pk])
+        wait = daemon.scheduler.next_deadline() - daemon._gateway_time()
+        self.assertLessEqual(wait, settings.BOT_DAEMON_RETRY_DELAY)
+
+        # The retry survives a rebuild from the database
+        daemon.scheduler.rebuild()
+        self.assertIn(RETRY, daemon.scheduler._events[signal.pk])
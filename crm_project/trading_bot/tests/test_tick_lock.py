@@ -0,0 +1,49 @@
+"""
+Fencing of a tick whose lease was lost
+"""
+
+from unittest import mock
+
+from trading_bot import metrics
+from trading_bot.bot_signal_manager import BotSignalManager
+from trading_bot.tests.base import SimulatorTestCase
+from trading_bot.tick_lock import LeaseLost, TickLease, tick_lease
+
+
+def acquire(lease):
+    lease.token = 1
+    return lease.token
+
+
+class TickFenceTest(SimulatorTestCase):
+
+    def run_tick(self, ib, renewed: bool):
+        manager = BotSignalManager(ib)
+        with mock.patch.object(TickLease, 'acquire', acquire), \
+                mock.patch.object(TickLease, 'renew', return_value=renewed), \
+                mock.patch.object(TickLease, 'release'):
+            with tick_lease() as lease:
+                self.assertIsNotNone(lease)
+                manager.manage_signals()
+
+    def test_lost_lease_stops_orders(self):
+        ib = self.make_ib()
+        signal = self.make_signal(entry_in=-1)
+        rejections = metrics.tick_fence_rejections._values.get((), 0)
+
+        with self.assertRaises(LeaseLost):
+            self.run_tick(ib, renewed=False)
+
+        self.assertEqual(ib.trades(), [])
+        self.assertEqual(metrics.tick_fence_rejections._values.get(()), rejections + 1)
+        signal.refresh_from_db()
+        self.assertIsNone(signal.order_id)
+
+    def test_renewed_lease_places_orders(self):
+        ib = self.make_ib()
+        signal = self.make_signal(entry_in=-1)
+
+        self.run_tick(ib, renewed=True)
+
+        signal.refresh_from_db()
+        self.assertIsNotNone(signal.order_id)
@@ -0,0 +1,159 @@
+"""
+Redis lease lock with fencing tokens around the bot tick
+"""
+
+import contextlib
+import contextvars
+import logging
+import os
+import socket
+import uuid
+
+from django.conf import settings
+
+from trading_bot import metrics
+from trading_bot.redis_client import get_redis, report_failure
+
+logger = logging.getLogger("bot")
+
+# Take the lease and issue the next fencing token in one step
+_ACQUIRE = """
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    local token = redis.call('incr', KEYS[2])
+    redis.call('set', KEYS[1], ARGV[1] .. ':' .. token, 'PX', ARGV[2])
+    return token
+end
+return false
+"""
+# Extend or release the lease only while it still holds our value
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseLost(Exception):
+    """The lease expired or was taken over, the tick must not place orders"""
+
+
+class TickLease:
+    """
+    Lease on the bot tick.
+
+    The lease expires by itself after ttl seconds, so a crashed worker does
+    not block the bot. Every acquisition gets a fencing token from a
+    monotonic counter; a holder whose lease expired sees another token in
+    the key and stops before touching the gateway.
+    """
+
+    def __init__(self, name: str, ttl: float = None):
+        """
+        Args:
+            name: Lock name, the Redis keys are derived from it
+            ttl: Lease lifetime in seconds
+        """
+        self.key = f'{settings.BOT_TICK_LEASE_KEY}:{name}'
+        self.fence_key = f'{self.key}:fence'
+        self.ttl_ms = int((ttl or settings.BOT_TICK_LEASE_TTL) * 1000)
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.token = None
+
+    @property
+    def value(self) -> str:
+        return f'{self.owner}:{self.token}'
+
+    def acquire(self) -> int | None:
+        """
+        Returns:
+            int | None: Fencing token, None if the lease is held by someone else
+        """
+        token = get_redis().eval(_ACQUIRE, 2, self.key, self.fence_key, self.owner, self.ttl_ms)
+        self.token = int(token) if token else None
+        return self.token
+
+    def renew(self) -> bool:
+        """
+        Extend the lease by its ttl
+
+        Returns:
+            bool: False if the lease is no longer ours
+        """
+        return bool(get_redis().eval(_RENEW, 1, self.key, self.value, self.ttl_ms))
+
+    def release(self) -> None:
+        get_redis().eval(_RELEASE, 1, self.key, self.value)
+
+
+_current: contextvars.ContextVar[TickLease | None] = contextvars.ContextVar('tick_lease', default=None)
+
+
+@contextlib.contextmanager
+def tick_lease(name: str = 'manage_bot'):
+    """
+    Run the block under the tick lease.
+
+    Yields the lease, or None when another tick holds it; the caller skips
+    its tick then. If Redis is unavailable the tick runs unprotected, as
+    the rest of the bot does without Redis.
+
+    Example:
+        with tick_lease() as lease:
+            if lease is None:
+                return
+            manager.manage_signals()
+    """
+    lease = TickLease(name)
+    try:
+        acquired = lease.acquire()
+    except Exception as e:
+        report_failure(e)
+        logger.warning("Tick lease unavailable, running without it: %s", e)
+        yield lease
+        return
+
+    if acquired is None:
+        metrics.tick_overlaps.inc()
+        logger.warning("Previous bot tick is still running, skipping this one")
+        yield None
+        return
+
+    token = _current.set(lease)
+    try:
+        yield lease
+    finally:
+        _current.reset(token)
+        try:
+            lease.release()
+        except Exception as e:
+            report_failure(e)
+            logger.debug("Failed to release tick lease: %s", e)
+
+
+def check_fence() -> None:
+    """
+    Renew the lease of the running tick before side effects at the gateway
+
+    Raises:
+        LeaseLost: If the lease of this tick expired and may be held by
+            another tick
+    """
+    lease = _current.get()
+    if lease is None or lease.token is None:
+        return
+    try:
+        held = lease.renew()
+    except Exception as e:
+        report_failure(e)
+        logger.debug("Failed to renew tick lease: %s", e)
+        return
+    if not held:
+        metrics.tick_fence_rejections.inc()
+        raise LeaseLost(f"Tick lease {lease.token} expired, not placing orders")
@@ -0,0 +1,174 @@
+"""
+Compiled trading-session calendars for IB contracts
+"""
+
+import logging
+from bisect import bisect_right
+from datetime import date, datetime, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from ib_insync import ContractDetails
+
+logger = logging.getLogger('trading_bot.core.bot_signal_manager')
+
+
+class TradingCalendar:
+    """
+    Trading sessions of one contract as sorted arrays of UTC epochs.
+
+    Sessions never overlap, so both the open check and the next open lookup
+    are a single bisect over the session starts.
+    """
+
+    def __init__(self, sessions: list[tuple[float, float]], compiled_on: date):
+        """
+        Args:
+            sessions: (start, end) UTC epochs of open sessions
+            compiled_on: Day the calendar was compiled for
+        """
+        sessions = sorted(sessions)
+        self.starts = [start for start, _ in sessions]
+        self.ends = [end for _, end in sessions]
+        self.compiled_on = compiled_on
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def is_open(self, moment: datetime) -> bool:
+        """
+        Returns:
+            bool: True if the moment falls into an open session (bounds included)
+        """
+        ts = moment.timestamp()
+        index = bisect_right(self.starts, ts) - 1
+        return index >= 0 and ts <= self.ends[index]
+
+    def next_open(self, moment: datetime) -> datetime | None:
+        """
+        Returns:
+            datetime | None: The moment itself if the market is open, otherwise
+            the start of the next session in UTC, or None if the schedule
+            has no sessions left
+        """
+        if self.is_open(moment):
+            return moment
+        index = bisect_right(self.starts, moment.timestamp())
+        if index >= len(self.starts):
+            return None
+        return datetime.fromtimestamp(self.starts[index], tz=dt_timezone.utc)
+
+    def session_end(self, moment: datetime) -> datetime | None:
+        """
+        Returns:
+            datetime | None: End of the session the moment falls into
+        """
+        if not self.is_open(moment):
+            return None
+        index = bisect_right(self.starts, moment.timestamp()) - 1
+        return datetime.fromtimestamp(self.ends[index], tz=dt_timezone.utc)
+
+
+def _parse_point(value: str, day: str, tz: ZoneInfo) -> float:
+    """
+    Parse 'HHMM' or 'YYYYMMDD:HHMM' into a UTC epoch
+
+    Args:
+        value: Time point from the tradingHours string
+        day: Session day used when the point has no date
+        tz: Exchange time zone
+    """
+    if ':' in value:
+        day, value = value.split(':', 1)
+    return datetime(
+        year=int(day[0:4]),
+        month=int(day[4:6]),
+        day=int(day[6:8]),
+        hour=int(value[0:2]),
+        minute=int(value[2:4]),
+        tzinfo=tz,
+    ).timestamp()
+
+
+def compile_trading_hours(trading_hours: str, time_zone_id: str,
+                          compiled_on: date = None) -> TradingCalendar:
+    """
+    Compile an IB tradingHours string into a TradingCalendar.
+
+    Supports both the current format
+    '20250102:1700-20250103:1600;20250104:CLOSED' and the legacy one
+    '20250102:0930-1200,1300-1600'.
+
+    Args:
+        trading_hours: ContractDetails.tradingHours
+        time_zone_id: ContractDetails.timeZoneId
+        compiled_on: Day the calendar is compiled for
+
+    Returns:
+        TradingCalendar: Compiled calendar
+    """
+    tz = ZoneInfo(time_zone_id)
+    sessions = []
+    for entry in trading_hours.split(';'):
+        entry = entry.strip()
+        if not entry:
+            continue
+        day, ranges = entry.split(':', 1)
+        if ranges == 'CLOSED':
+            continue
+        for session in ranges.split(','):
+            start, end = session.split('-', 1)
+            sessions.append((_parse_point(start, day, tz), _parse_point(end, day, tz)))
+    return TradingCalendar(sessions, compiled_on or date.today())
+
+
+class TradingCalendarCache:
+    """
+    Compiled calendars per conId, recompiled once per day.
+
+    All signals on the same symbol resolve to the same conId and therefore
+    share one calendar.
+    """
+
+    def __init__(self):
+        self._calendars: dict[int, TradingCalendar] = {}
+
+    def get(self, details: ContractDetails, today: date) -> TradingCalendar:
+        """
+        Returns the calendar of the contract compiled for the given day
+
+        Args:
+            details: Contract details with tradingHours and timeZoneId
+            today: Current day
+        """
+        con_id = details.contract.conId
+        calendar = self._calendars.get(con_id)
+        if calendar is not None and calendar.compiled_on == today:
+            return calendar
+
+        calendar = compile_trading_hours(
+            details.tradingHours, details.timeZoneId, compiled_on=today
+        )
+        # Calendars compiled on previous days are stale anyway
+        self._calendars = {
+            key: value for key, value in self._calendars.items()
+            if value.compiled_on == today
+        }
+        self._calendars[con_id] = calendar
+        logger.info(
+            f"Compiled trading calendar for conId {con_id}: "
+            f"{len(calendar)} sessions ({details.timeZoneId})"
+        )
+        return calendar
+
+    def invalidate(self, con_id: int) -> None:
+        self._calendars.pop(con_id, None)
+
+    def on_contract_roll(self, key, old_con_id: int, new_con_id: int) -> None:
+        """
+        Contract cache roll listener: the old contract's calendar is useless
+        """
+        self.invalidate(old_con_id)
+
+
+# Create global calendar cache instance
+trading_calendars = TradingCalendarCache()
@@ -6,4 +6,5 @@ app_name = 'trading_bot'
 urlpatterns = [
     path('api/bot/state/', views.get_bot_state, name='get_bot_state'),
     path('api/bot/toggle/', views.toggle_bot_state, name='toggle_bot_state'),
+    path('metrics/', views.metrics, name='metrics'),
 ] 
\ No newline at end of file
@@ -1,18 +1,16 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.views.decorators.http import require_http_methods
 from .models import BotState
+from . import metrics as bot_metrics
 
 # Create your views here.
 
 @require_http_methods(["GET"])
 def get_bot_state(request):
     """Получить текущее состояние бота"""
-    state = BotState.get_state()
-    return JsonResponse({
-        'is_running': state.is_running,
-        'last_updated': state.last_updated.isoformat()
-    })
+    return JsonResponse(BotState.cached_state())
 
 @require_http_methods(["POST"])
 def toggle_bot_state(request):
@@ -24,3 +22,14 @@ def toggle_bot_state(request):
         'is_running': state.is_running,
         'last_updated': state.last_updated.isoformat()
     })
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Метрики задержек бота в формате Prometheus, только для сбора с адресов
+    BOT_METRICS_ALLOWED_IPS. Отдает последний снимок, опубликованный процессом
+    бота в Redis, а не реестр веб-процесса (пусто, если снимка нет).
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.BOT_METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(bot_metrics.published_snapshot(), content_type=bot_metrics.CONTENT_TYPE)